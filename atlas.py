@@ -0,0 +1,130 @@
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QImage, QPainter
+
+import logos
+import pack
+import tracing
+
+# Texture atlas of pre-scaled logos. Each (logo, size) the renderer needs is
+# scaled once and packed into a few large pages with a simple shelf packer;
+# drawing a logo is then one blit from a sub-rectangle of a page instead of a
+# scale from the source image. Entries are keyed by the logo registry's
+# content digest, so byte-identical files share one entry, and dropped when
+# the registry reports their content gone.
+
+PAGE_SIZE = 2048
+PADDING = 1
+
+
+class LogoAtlas:
+    def __init__(self, page_size=PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = []
+        self.entries = {}
+        self.shelf = None
+        # digests reported by the registry, dropped by the rendering thread
+        self.stale = []
+        logos.registry.add_listener(self.forget)
+
+    def forget(self, digests):
+        self.stale.extend(digests)
+
+    def drop_stale(self):
+        digests = set()
+        while self.stale:
+            digests.add(self.stale.pop())
+        if digests:
+            self.entries = {key : entry for key, entry in self.entries.items() if key[0] not in digests}
+
+    def key(self, path, size):
+        # (digest, size), digest None when the logo does not exist
+        return (logos.registry.info(path).digest if path else None, size)
+
+    def new_page(self, width, height):
+        page = QImage(max(width, self.page_size), max(height, self.page_size), QImage.Format.Format_ARGB32_Premultiplied)
+        page.fill(Qt.GlobalColor.transparent)
+        self.pages.append(page)
+        # (page index, x, shelf top, shelf height)
+        self.shelf = [len(self.pages) - 1, 0, 0, 0]
+
+    def place(self, width, height):
+        if self.shelf is None:
+            self.new_page(width, height)
+        index, x, top, shelf_height = self.shelf
+        page = self.pages[index]
+        if x + width > page.width():
+            # start a new shelf under the current one
+            top += shelf_height + PADDING
+            x = 0
+            shelf_height = 0
+        if top + height > page.height() or width > page.width():
+            self.new_page(width, height)
+            index, x, top, shelf_height = self.shelf
+        self.shelf = [index, x + width + PADDING, top, max(shelf_height, height)]
+        return index, QRect(x, top, width, height)
+
+    @tracing.traced("LogoAtlas.ensure", "render")
+    def ensure(self, requests):
+        # packs any (path, size) pairs not already in the atlas, tallest first
+        self.drop_stale()
+        missing = {}
+        for path, size in dict.fromkeys(requests):
+            key = self.key(path, size)
+            if key[0] is not None and key not in self.entries:
+                missing.setdefault(key, path)
+        if not missing:
+            return
+        sources = {}
+        scaled = []
+        for key, path in missing.items():
+            digest, size = key
+            if digest not in sources:
+                sources[digest] = pack.load_image(path)
+            source = sources[digest]
+            if source.isNull() or size <= 0:
+                self.entries[key] = None
+                continue
+            scaled.append((key, source.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                              Qt.TransformationMode.SmoothTransformation)))
+        scaled.sort(key=lambda item: item[1].height(), reverse=True)
+        painters = {}
+        for key, image in scaled:
+            index, rect = self.place(image.width(), image.height())
+            if index not in painters:
+                painters[index] = QPainter(self.pages[index])
+                painters[index].setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+            painters[index].drawImage(rect.topLeft(), image)
+            self.entries[key] = (index, rect)
+        for painter in painters.values():
+            painter.end()
+
+    def lookup(self, path, size):
+        # (page image, source rect) for a logo at size, or None if it has no
+        # image; packs it first if needed
+        key = self.key(path, size)
+        if key[0] is None:
+            return None
+        if key not in self.entries:
+            self.ensure([(path, size)])
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return self.pages[entry[0]], entry[1]
+
+    def draw(self, painter, x, y, path, size, center_height=None):
+        # blits the logo with its top left at (x, y), or vertically centered in
+        # center_height; returns the drawn width, 0 if there is no logo
+        found = self.lookup(path, size)
+        if found is None:
+            return 0
+        page, rect = found
+        if center_height is not None:
+            y += (center_height - rect.height()) // 2
+        painter.drawImage(QRect(x, y, rect.width(), rect.height()), page, rect)
+        return rect.width()
+
+    def clear(self):
+        self.pages = []
+        self.entries = {}
+        self.shelf = None
+        self.stale = []
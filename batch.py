@@ -0,0 +1,120 @@
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+import data_management
+
+# Headless entry point for validating and normalizing schedule files.
+# Nothing here may import PyQt6, directly or through data_management.
+
+
+def process_file(path, output_dir=None, in_place=False):
+    result = {"file": path, "issues": [], "error": None, "timings": {}}
+    timings = result['timings']
+    try:
+        start = time.perf_counter()
+        json = data_management.loadJSON(path)
+        timings['load'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        data = data_management.parseJSON2(json)
+        timings['parse'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result['issues'] = data_management.check_data(data)
+        timings['check'] = time.perf_counter() - start
+
+        output = None
+        if in_place:
+            output = path
+        elif output_dir:
+            output = os.path.join(output_dir, os.path.basename(path))
+        if output:
+            start = time.perf_counter()
+            data_management.save_data(output, data)
+            timings['save'] = time.perf_counter() - start
+        result['blocks'] = len(data['blocks'])
+    except Exception as e:
+        result['error'] = "%s: %s" % (type(e).__name__, e)
+    result['total'] = sum(timings.values())
+    return result
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".json"):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def print_result(result, verbose):
+    if result['error']:
+        status = "ERROR"
+    elif result['issues']:
+        status = "%d issues" % len(result['issues'])
+    else:
+        status = "ok"
+    steps = " ".join("%s=%.1fms" % (step, seconds * 1000) for step, seconds in result['timings'].items())
+    print("%-8s %7.1fms  %s  [%s]" % (status, result['total'] * 1000, result['file'], steps))
+    if result['error']:
+        print("    " + result['error'])
+    if verbose:
+        for issue in result['issues']:
+            print("    " + issue)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and normalize schedule files without starting the editor.")
+    parser.add_argument("paths", nargs="+", help="schedule files or directories of .json files")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-o", "--output-dir", help="write normalized files into this directory")
+    output.add_argument("--in-place", action="store_true", help="overwrite each input with its normalized form")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list every issue found")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero if any file has issues")
+    args = parser.parse_args(argv)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    files = collect_files(args.paths)
+
+    start = time.perf_counter()
+    results = []
+    if args.jobs <= 1 or len(files) <= 1:
+        for path in files:
+            results.append(process_file(path, args.output_dir, args.in_place))
+            print_result(results[-1], args.verbose)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(process_file, path, args.output_dir, args.in_place) for path in files]
+            for future in concurrent.futures.as_completed(futures):
+                results.append(future.result())
+                print_result(results[-1], args.verbose)
+    elapsed = time.perf_counter() - start
+
+    errors = [result for result in results if result['error']]
+    with_issues = [result for result in results if result['issues'] and not result['error']]
+    issue_count = sum(len(result['issues']) for result in results)
+    blocks = sum(result.get('blocks', 0) for result in results)
+    slowest = max(results, key=lambda result: result['total'], default=None)
+
+    print()
+    print("%d files, %d blocks in %.2fs (%d jobs)" % (len(results), blocks, elapsed, args.jobs))
+    print("%d ok, %d with issues (%d total), %d failed" % (len(results) - len(errors) - len(with_issues), len(with_issues), issue_count, len(errors)))
+    if slowest:
+        print("slowest: %s (%.1fms)" % (slowest['file'], slowest['total'] * 1000))
+
+    if errors or (args.strict and with_issues):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_management
+import generate_schedule
+
+# data_management at scale. Results are written as JSON so runs can be
+# compared with --compare.
+
+SIZES = [1000, 10000, 100000]
+OPERATIONS = 200
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms" : statistics.median(samples) * 1000, "min_ms" : min(samples) * 1000, "runs" : repeat}
+
+
+def bench_size(total, repeat, seed, workdir):
+    days, streams, blocks = generate_schedule.shape_for(total)
+    schedule = generate_schedule.generate(days, streams, blocks, 40, seed)
+    path = os.path.join(workdir, "schedule_%d.json" % total)
+    with open(path, 'w', encoding="utf-8") as outfile:
+        json.dump(schedule, outfile)
+    out_path = os.path.join(workdir, "saved_%d.json" % total)
+
+    results = {"blocks" : days * streams * blocks, "days" : days, "streams" : streams, "blocks_per_stream" : blocks}
+    results['load'] = timed(lambda: data_management.loadJSON(path), repeat)
+
+    raw = data_management.loadJSON(path)
+    copies = [copy.deepcopy(raw) for _ in range(repeat)]
+    results['parse'] = timed(lambda: data_management.parseJSON2(copies.pop()), repeat)
+
+    data = data_management.parseJSON2(copy.deepcopy(raw))
+    results['save'] = timed(lambda: data_management.save_data(out_path, data), repeat)
+
+    rng = random.Random(seed)
+    day_ids = list(data['days'])
+    game_ids = list(data['games'])
+
+    def add_blocks():
+        for _ in range(OPERATIONS):
+            day_id = rng.choice(day_ids)
+            stream_id = rng.choice(data['days'][day_id]['streams'])
+            data_management.add_block(data, day_id, stream_id, rng.choice(game_ids), "Bench", 600, 660)
+
+    def remove_blocks():
+        for block_id in rng.sample(list(data['blocks']), OPERATIONS):
+            data_management.remove_block(data, block_id)
+
+    def rename_games():
+        for _ in range(OPERATIONS):
+            game_id = rng.choice(game_ids)
+            data_management.update_game(data, game_id, 'name', data['games'][game_id]['name'] + "'")
+
+    for name, function in [("add_block", add_blocks), ("remove_block", remove_blocks), ("rename_game", rename_games)]:
+        result = timed(function, repeat)
+        result['per_op_us'] = result['median_ms'] * 1000 / OPERATIONS
+        results[name] = result
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, previous):
+    print("%-8s %-14s %12s %12s %8s" % ("blocks", "operation", "previous", "current", "change"))
+    for size, current in results['sizes'].items():
+        old = previous['sizes'].get(size)
+        if old is None:
+            continue
+        for name, value in current.items():
+            if not isinstance(value, dict) or name not in old:
+                continue
+            before = old[name]['median_ms']
+            after = value['median_ms']
+            change = (after - before) / before * 100 if before else 0.0
+            print("%-8s %-14s %10.2fms %10.2fms %+7.1f%%" % (size, name, before, after, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load/parse/save and model edits at scale.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="total block counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        "benchmark" : "data_management",
+        "revision" : git_revision(),
+        "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python" : platform.python_version(),
+        "machine" : platform.machine(),
+        "seed" : args.seed,
+        "sizes" : {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for total in args.sizes:
+            results['sizes'][str(total)] = bench_size(total, args.repeat, args.seed, workdir)
+            print("done %d blocks" % total, file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as outfile:
+            json.dump(results, outfile, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as infile:
+            previous = json.load(infile)
+        compare(results, previous)
+
+
+if __name__ == "__main__":
+    main()
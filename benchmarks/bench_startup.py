@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Time-to-first-paint of the editor window, measured from process spawn so
+# interpreter start and module imports are included. Each sample runs in a
+# fresh interpreter.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(schedule):
+    sys.path.insert(0, ROOT)
+    import data_management
+    if schedule:
+        data = data_management.parseJSON2(data_management.loadJSON(schedule))
+    else:
+        data = data_management.load_empty()
+    loaded = time.time()
+
+    from PyQt6.QtCore import QEvent, QObject
+    from PyQt6.QtWidgets import QApplication
+    import widgets
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and not result:
+                result['first_paint'] = time.time()
+                QApplication.instance().quit()
+            return False
+
+    result = {}
+    app = QApplication(sys.argv[:1])
+    watcher = PaintWatcher()
+    app.installEventFilter(watcher)
+    window = widgets.mainWindow(data)
+    app.exec()
+    window.close()
+    result['loaded'] = loaded
+    result['blocks'] = len(data['blocks'])
+    print(json.dumps(result))
+
+
+def sample(schedule):
+    command = [sys.executable, os.path.abspath(__file__), "--child"]
+    if schedule:
+        command += ["--schedule", schedule]
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # the editor's autosaves go to a throwaway directory, so neither a real
+    # recovery prompt nor benchmark leftovers get into the measurement
+    with tempfile.TemporaryDirectory() as autosave:
+        env['SCHEDULE_AUTOSAVE_DIR'] = autosave
+        start = time.time()
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {
+        "first_paint": result['first_paint'] - start,
+        "load": result['loaded'] - start,
+        "blocks": result['blocks'],
+    }
+
+
+def measure(name, schedule, runs):
+    samples = [sample(schedule) for _ in range(runs)]
+    paints = [s['first_paint'] for s in samples]
+    return {
+        "case": name,
+        "blocks": samples[0]['blocks'],
+        "runs": runs,
+        "first_paint_median_ms": statistics.median(paints) * 1000,
+        "first_paint_min_ms": min(paints) * 1000,
+        "load_median_ms": statistics.median(s['load'] for s in samples) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure editor time-to-first-paint.")
+    parser.add_argument("--schedule", help="large schedule file to load for the second case")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.schedule)
+        return
+
+    results = [measure("empty", None, args.runs)]
+    if args.schedule:
+        results.append(measure("schedule", args.schedule, args.runs))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print("%-10s %7d blocks  first paint %8.1fms (min %.1fms)  data ready %7.1fms" % (
+            result['case'], result['blocks'], result['first_paint_median_ms'],
+            result['first_paint_min_ms'], result['load_median_ms']))
+
+
+if __name__ == "__main__":
+    main()
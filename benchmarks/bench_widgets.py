@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication, QWidget
+
+import data_management
+import generate_schedule
+import widgets
+
+# Widget construction costs under the offscreen platform, for generated
+# schedules of increasing size.
+
+SIZES = [200, 1000, 5000]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def widget_count(widget):
+    return len(widget.findChildren(QWidget)) + 1
+
+
+def timed(app, function, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    return result, {"median_ms" : statistics.median(samples) * 1000, "min_ms" : min(samples) * 1000, "runs" : repeat}
+
+
+def bench_size(app, total, repeat, seed):
+    days, streams, blocks = generate_schedule.shape_for(total)
+    data = data_management.parseJSON2(generate_schedule.generate(days, streams, blocks, 40, seed))
+    day_id = list(data['days'])[0]
+    stream_id = data['days'][day_id]['streams'][0]
+    results = {"blocks" : len(data['blocks']), "streams_per_day" : streams, "blocks_per_stream" : blocks}
+
+    def operation(name, function):
+        widget, result = timed(app, function, repeat)
+        if isinstance(widget, QWidget):
+            result['widgets'] = widget_count(widget)
+        result['peak_rss_mb'] = peak_rss_mb()
+        results[name] = result
+        return widget
+
+    def load_day():
+        tab.currentDayID = None
+        tab.loadDayStreams(day_id)
+        return tab.StreamsColumn
+
+    def load_blocks():
+        tab.loadStreamBlocks(stream_id)
+        return tab.BlockColumn
+
+    tab = widgets.BlocksTab(data)
+    operation("BlocksTab", lambda: widgets.BlocksTab(data))
+    operation("loadDayStreams", load_day)
+    operation("loadStreamBlocks", load_blocks)
+    operation("GameTab", lambda: widgets.GameTab(data))
+    operation("StreamTab", lambda: widgets.StreamTab(data))
+
+    def change_tabs(index):
+        main.changeTabs(index)
+        return main.widget(index).widget()
+
+    main = widgets.mainTab(data)
+    for label in ["Blocks", "Days", "Games", "Streams", "Event"]:
+        index = [main.tabText(i) for i in range(main.count())].index(label)
+        operation("changeTabs:" + label, lambda: change_tabs(index))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark widget construction under the offscreen platform.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="total block counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    results = {
+        "benchmark" : "widgets",
+        "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python" : platform.python_version(),
+        "platform" : app.platformName(),
+        "sizes" : {}
+    }
+    for total in args.sizes:
+        results['sizes'][str(total)] = bench_size(app, total, args.repeat, args.seed)
+        print("done %d blocks" % total, file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as outfile:
+            json.dump(results, outfile, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
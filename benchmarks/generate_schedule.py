@@ -0,0 +1,115 @@
+import argparse
+import json
+import random
+
+# Seeded generator for schedule files in the shape save_data writes, i.e.
+# event.days[].streams[].blocks[] plus the top level games/streams/zones.
+
+ROUNDS = ["Pools", "Round 1", "Round 2", "Top 32", "Top 16", "Top 8", "Winners Finals", "Losers Finals", "Grand Finals"]
+PLATFORMS = ["twitch", "youtube", "kick"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+ZONES = [("ET", "America/New_York", "12h"), ("PT", "America/Los_Angeles", "12h"),
+         ("UK", "Europe/London", "24h"), ("JP", "Asia/Tokyo", "24h")]
+
+
+def generate(days=3, streams=4, blocks=10, games=8, seed=0, logo_dir="logos"):
+    # blocks is the number of blocks per stream per day
+    rng = random.Random(seed)
+    game_list = []
+    for index in range(games):
+        game_list.append({
+            "name" : "Game %d" % index,
+            "logo" : "%s/game%d.png" % (logo_dir, index),
+            "color" : "#%06x" % rng.randrange(0x1000000)
+        })
+    stream_list = []
+    for index in range(streams):
+        stream_list.append({
+            "stream" : "channel%d" % index,
+            "platform" : PLATFORMS[index % len(PLATFORMS)],
+            "logo" : "%s/stream%d.png" % (logo_dir, index)
+        })
+
+    length = max(1, 1440 // max(blocks, 1))
+    day_list = []
+    for day_index in range(days):
+        day_streams = []
+        for stream in stream_list:
+            block_list = []
+            for index in range(blocks):
+                game = rng.choice(game_list)
+                start = (index * length) % 1440
+                end = min(start + length, 1439)
+                block_list.append({
+                    "game" : game['name'],
+                    "block_logo" : game['logo'],
+                    "round" : rng.choice(ROUNDS),
+                    "start" : "%02d:%02d:00" % (start // 60, start % 60),
+                    "end" : "%02d:%02d:00" % (end // 60, end % 60),
+                    "color" : game['color'],
+                    "shifted" : False
+                })
+            day_streams.append({
+                "stream" : stream['stream'],
+                "platform" : stream['platform'],
+                "stream_logo" : stream['logo'],
+                "blocks" : block_list
+            })
+        day_list.append({
+            "day" : DAY_NAMES[(4 + day_index) % 7],
+            "date" : "03-%02d-2025" % (7 + day_index),
+            "streams" : day_streams
+        })
+
+    event = {
+        "name" : "Generated Event %d" % seed,
+        "dates" : "March 2025",
+        "location" : "Nowhere",
+        "twitter" : "@generated",
+        "hashtag" : "#generated",
+        "time zone" : "America/Chicago",
+        "scheduler" : "generate_schedule",
+        "zone_text" : "CT",
+        "time format" : "12h",
+        "title_line1" : "Generated",
+        "title_line2" : "Schedule",
+        "official_schedule" : None,
+        "days" : day_list,
+        "games" : game_list,
+        "streams" : stream_list,
+        "zones" : [{"text" : text, "identifier" : identifier, "format" : format} for text, identifier, format in ZONES]
+    }
+    return {"event" : event}
+
+
+def shape_for(total_blocks):
+    # days x streams x blocks-per-stream roughly matching total_blocks
+    if total_blocks <= 1000:
+        return 4, 10, max(1, total_blocks // 40)
+    if total_blocks <= 10000:
+        return 4, 25, max(1, total_blocks // 100)
+    return 4, 50, max(1, total_blocks // 200)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic schedule file.")
+    parser.add_argument("output")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--blocks", type=int, default=10, help="blocks per stream per day")
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--total", type=int, help="pick days/streams/blocks for roughly this many blocks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--logo-dir", default="logos")
+    args = parser.parse_args(argv)
+
+    days, streams, blocks = args.days, args.streams, args.blocks
+    if args.total:
+        days, streams, blocks = shape_for(args.total)
+    schedule = generate(days, streams, blocks, args.games, args.seed, args.logo_dir)
+    with open(args.output, 'w', encoding="utf-8") as outfile:
+        json.dump(schedule, outfile, indent=3)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
+import copy
 import json
 import shortuuid
+import time_management
+import tracing
 
 
+@tracing.traced("loadJSON", "io")
 def loadJSON(file):
     with open(file) as jsonfile:
         data = json.load(jsonfile)
@@ -9,6 +13,16 @@ def loadJSON(file):
     return data
 
 
+def _stable_id(obj, existing):
+    # ids saved by save_data are kept so caches and references survive a
+    # reload; missing or clashing ones are minted
+    entity_id = obj.get('id')
+    if not isinstance(entity_id, str) or not entity_id or entity_id in existing:
+        return shortuuid.uuid()
+    return entity_id
+
+
+@tracing.traced("parseJSON2", "io")
 def parseJSON2(data):
     event = {}
     games = {}
@@ -26,13 +40,15 @@ def parseJSON2(data):
     zone_list = event.pop("zones")
     zones = {}
     for zone in zone_list:
-        zones[shortuuid.uuid()] = zone
+        zone_id = _stable_id(zone, zones)
+        zone.pop('id', None)
+        zones[zone_id] = zone
 
     for stream in stream_struct:
         stream_link = stream['platform'] + stream['stream']
         stream_id = None
         if not stream_link in stream_map.keys():
-            stream_id = shortuuid.uuid()
+            stream_id = _stable_id(stream, streams)
             stream_map[stream_link] = stream_id
             stream_obj = {
                 "platform" : stream['platform'],
@@ -45,7 +61,7 @@ def parseJSON2(data):
     for game in games_struct:
         name = game['name']
         if name not in game_map.keys():
-            game_id = shortuuid.uuid()
+            game_id = _stable_id(game, games)
             game_map[name] = game_id
             game_obj = {
                 "name" : game['name'],
@@ -54,7 +70,7 @@ def parseJSON2(data):
             }
             games[game_id] = game_obj
     for day in day_struct:
-        day_id = shortuuid.uuid()
+        day_id = _stable_id(day, days)
         day_obj = {
             "day" : day['day'],
             "date" : day['date'],
@@ -68,7 +84,7 @@ def parseJSON2(data):
             if stream_link in stream_map.keys():
                 stream_id = stream_map[stream_link]
             else:
-                stream_id = shortuuid.uuid()
+                stream_id = _stable_id(stream, streams)
                 stream_map[stream_link] = stream_id
                 stream_obj = {
                     "platform" : stream['platform'],
@@ -79,7 +95,7 @@ def parseJSON2(data):
                 streams[stream_id] = stream_obj
             day_obj['streams'].append(stream_id)
             for block in stream['blocks']:
-                block_id = shortuuid.uuid()
+                block_id = _stable_id(block, blocks)
                 streams[stream_id]['blocks'].append(block_id)
                 days[day_id]['blocks'].append(block_id)
                 game_id = None
@@ -100,8 +116,8 @@ def parseJSON2(data):
                 block_obj = {
                     "game" : game_id,
                     "round" : block['round'],
-                    "start" : block['start'],
-                    "end" : block['end']
+                    "start" : time_management.time_to_minutes(block['start']),
+                    "end" : time_management.time_to_minutes(block['end'])
                 }
                 blocks[block_id] = block_obj
                 
@@ -133,7 +149,8 @@ def load_empty():
     return{"event":event, "days":days, "games":games, "streams":streams, "blocks":blocks, "zones":zones, "stream_map":stream_map, "game_map":game_map}
 
 
-def save_data(fileName, data):
+def dump_data(data):
+    # the saved-file form of a model, as written by save_data
     event_dictionary = {}
     for key in data['event']:
         event_dictionary[key] = data['event'][key]
@@ -141,27 +158,31 @@ def save_data(fileName, data):
     day_list = []
     for day in data['days']:
         day_struct = data['days'][day]
-        day_obj = {"day" : day_struct['day'],
+        day_obj = {"id" : day,
+                   "day" : day_struct['day'],
                    "date" : day_struct['date'],
                    "streams" : []}
+        day_blocks = set(day_struct['blocks'])
         for stream in day_struct['streams']:
             stream_struct = data['streams'][stream]
             stream_obj = {
+                "id" : stream,
                 "stream" : stream_struct["stream"],
                 "platform" : stream_struct["platform"],
                 "stream_logo" : stream_struct['logo'],
                 "blocks" : []
             }
             for block in stream_struct['blocks']:
-                if block in day_struct['blocks']:
+                if block in day_blocks:
                     block_struct = data['blocks'][block]
                     game_data = data['games'][block_struct['game']]
                     block_obj = {
+                        "id" : block,
                         "game" : game_data['name'],
                         "block_logo" : game_data['logo'],
                         "round" : block_struct['round'],
-                        "start" : block_struct['start'],
-                        "end" : block_struct['end'],
+                        "start" : time_management.minutes_to_time(block_struct['start']),
+                        "end" : time_management.minutes_to_time(block_struct['end']),
                         "color" : game_data['color'],
                         "shifted" : False
                     }
@@ -179,6 +200,7 @@ def save_data(fileName, data):
     for zone in data['zones']:
         zone_struct = data['zones'][zone]
         zone_obj = {
+            "id" : zone,
             "text" : zone_struct['text'],
             "identifier" : zone_struct['identifier'],
             "format" : zone_struct['format']
@@ -188,6 +210,7 @@ def save_data(fileName, data):
     games = []
     for game in data['games']:
         game_obj = {
+            "id" : game,
             "name" : data['games'][game]['name'],
             "logo" : data['games'][game]['logo'],
             "color" : data['games'][game]['color']
@@ -197,6 +220,7 @@ def save_data(fileName, data):
     streams = []
     for stream in data['streams']:
         stream_obj = {
+            "id" : stream,
             "stream" : data['streams'][stream]['stream'],
             "platform" : data['streams'][stream]['platform'],
             "logo" : data['streams'][stream]['logo']
@@ -207,12 +231,276 @@ def save_data(fileName, data):
     event_dictionary['streams'] = streams
 
     event_dictionary['zones'] = zone_list
-    output = {"event": event_dictionary}
-    json_obj = json.dumps(output, indent=3)
+    return {"event": event_dictionary}
+
+
+@tracing.traced("save_data", "io")
+def save_data(fileName, data):
+    json_obj = json.dumps(dump_data(data), indent=3)
     with open(fileName, 'w', encoding="utf-8") as outfile:
         outfile.write(json_obj)
 
-    
-    
 
-    print(event_dictionary)
+def check_data(data):
+    issues = []
+    for day_id, day in data['days'].items():
+        if not day['date']:
+            issues.append("day %s has no date" % (day['day'] or day_id))
+        for stream_id in day['streams']:
+            if stream_id not in data['streams']:
+                issues.append("day %s references missing stream %s" % (day['date'], stream_id))
+    for block_id, block in data['blocks'].items():
+        if block['game'] not in data['games']:
+            issues.append("block %s references missing game %s" % (block_id, block['game']))
+        if block['start'] is None or block['end'] is None:
+            issues.append("block %s is missing a start or end time" % block_id)
+        elif time_management.block_length(block['start'], block['end']) == 0:
+            issues.append("block %s has zero length" % block_id)
+        elif time_management.block_length(block['start'], block['end']) > 1440:
+            issues.append("block %s is longer than 24 hours" % block_id)
+    for link, stream_id in data['stream_map'].items():
+        stream = data['streams'].get(stream_id)
+        if stream is None or stream['platform'] + stream['stream'] != link:
+            issues.append("stream_map entry %s is out of sync with streams" % link)
+    for name, game_id in data['game_map'].items():
+        game = data['games'].get(game_id)
+        if game is None or game['name'] != name:
+            issues.append("game_map entry %s is out of sync with games" % name)
+    return issues
+
+
+
+# Model mutations. Every edit to a loaded schedule goes through apply() as a
+# JSON-serializable record, so listeners (and anything replaying records) see
+# the same stream of changes the editor made.
+
+COLLECTIONS = {"day" : "days", "game" : "games", "stream" : "streams", "block" : "blocks", "zone" : "zones"}
+
+listeners = []
+
+
+def add_listener(listener):
+    listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in listeners:
+        listeners.remove(listener)
+
+
+def notify(data, record):
+    for listener in list(listeners):
+        listener(data, record)
+
+
+def apply(data, record):
+    # handlers return False for edits that leave the model unchanged, such as
+    # the signals widgets fire while filling themselves in
+    with tracing.span("apply:" + record['op'], "model", kind=record.get('kind'), id=record.get('id'), key=record.get('key')):
+        if handlers[record['op']](data, record) is False:
+            return None
+        notify(data, record)
+    return record
+
+
+def replace_data(data, new_data):
+    for key in ['days', 'event', 'games', 'streams', 'blocks', 'zones', 'game_map', 'stream_map']:
+        data[key] = new_data[key]
+    notify(data, {"op" : "reset"})
+
+
+def _insert(items, value, index):
+    if index is None or index > len(items):
+        items.append(value)
+    else:
+        items.insert(index, value)
+
+
+def _set(data, record):
+    kind = record['kind']
+    key = record['key']
+    if kind == "event":
+        target = data['event']
+    else:
+        target = data[COLLECTIONS[kind]][record['id']]
+    record['old'] = target.get(key)
+    if record['old'] == record['value']:
+        return False
+    if kind == "game" and key == "name":
+        data['game_map'].pop(target['name'], None)
+        data['game_map'][record['value']] = record['id']
+    target[key] = record['value']
+    if kind == "stream" and key in ("platform", "stream"):
+        old = dict(target, **{key : record['old']})
+        data['stream_map'].pop((old['platform'] or "") + (old['stream'] or ""), None)
+        data['stream_map'][(target['platform'] or "") + (target['stream'] or "")] = record['id']
+
+
+def _add(data, record):
+    kind = record['kind']
+    obj = copy.deepcopy(record['value'])
+    if kind == "block":
+        _insert(data['days'][record['day']]['blocks'], record['id'], record.get('day_index'))
+        _insert(data['streams'][record['stream']]['blocks'], record['id'], record.get('stream_index'))
+    elif kind == "game":
+        data['game_map'][obj['name']] = record['id']
+    elif kind == "stream":
+        data['stream_map'][(obj['platform'] or "") + (obj['stream'] or "")] = record['id']
+        for day_id, index in record.get('days', []):
+            _insert(data['days'][day_id]['streams'], record['id'], index)
+    data[COLLECTIONS[kind]][record['id']] = obj
+
+
+def _remove(data, record):
+    kind = record['kind']
+    obj_id = record['id']
+    obj = data[COLLECTIONS[kind]].pop(obj_id)
+    record['value'] = copy.deepcopy(obj)
+    if kind == "block":
+        for day_id, day in data['days'].items():
+            if obj_id in day['blocks']:
+                record['day'] = day_id
+                record['day_index'] = day['blocks'].index(obj_id)
+                day['blocks'].pop(record['day_index'])
+                break
+        for stream_id, stream in data['streams'].items():
+            if obj_id in stream['blocks']:
+                record['stream'] = stream_id
+                record['stream_index'] = stream['blocks'].index(obj_id)
+                stream['blocks'].pop(record['stream_index'])
+                break
+    elif kind == "game":
+        if data['game_map'].get(obj['name']) == obj_id:
+            data['game_map'].pop(obj['name'])
+    elif kind == "stream":
+        link = (obj['platform'] or "") + (obj['stream'] or "")
+        if data['stream_map'].get(link) == obj_id:
+            data['stream_map'].pop(link)
+        record['days'] = []
+        for day_id, day in data['days'].items():
+            if obj_id in day['streams']:
+                index = day['streams'].index(obj_id)
+                day['streams'].pop(index)
+                record['days'].append([day_id, index])
+
+
+def _add_day_stream(data, record):
+    _insert(data['days'][record['day']]['streams'], record['stream'], record.get('index'))
+
+
+def _remove_day_stream(data, record):
+    streams = data['days'][record['day']]['streams']
+    record['index'] = streams.index(record['stream'])
+    streams.pop(record['index'])
+
+
+handlers = {
+    "set" : _set,
+    "add" : _add,
+    "remove" : _remove,
+    "add_day_stream" : _add_day_stream,
+    "remove_day_stream" : _remove_day_stream,
+}
+
+
+def update_event(data, key, value):
+    return apply(data, {"op" : "set", "kind" : "event", "id" : None, "key" : key, "value" : value})
+
+
+def update_zone(data, zone_id, key, value):
+    return apply(data, {"op" : "set", "kind" : "zone", "id" : zone_id, "key" : key, "value" : value})
+
+
+def update_game(data, game_id, key, value):
+    return apply(data, {"op" : "set", "kind" : "game", "id" : game_id, "key" : key, "value" : value})
+
+
+def update_stream(data, stream_id, key, value):
+    return apply(data, {"op" : "set", "kind" : "stream", "id" : stream_id, "key" : key, "value" : value})
+
+
+def update_day(data, day_id, key, value):
+    return apply(data, {"op" : "set", "kind" : "day", "id" : day_id, "key" : key, "value" : value})
+
+
+def update_block(data, block_id, key, value):
+    return apply(data, {"op" : "set", "kind" : "block", "id" : block_id, "key" : key, "value" : value})
+
+
+def add_zone(data, text=None, identifier=None, format=None, zone_id=None):
+    zone_id = zone_id or shortuuid.uuid()
+    apply(data, {"op" : "add", "kind" : "zone", "id" : zone_id,
+                 "value" : {"text" : text, "identifier" : identifier, "format" : format}})
+    return zone_id
+
+
+def add_game(data, name, logo, color, game_id=None):
+    game_id = game_id or shortuuid.uuid()
+    apply(data, {"op" : "add", "kind" : "game", "id" : game_id,
+                 "value" : {"name" : name, "logo" : logo, "color" : color}})
+    return game_id
+
+
+def add_stream(data, platform, channel, logo, stream_id=None):
+    stream_id = stream_id or shortuuid.uuid()
+    apply(data, {"op" : "add", "kind" : "stream", "id" : stream_id,
+                 "value" : {"platform" : platform, "stream" : channel, "logo" : logo, "blocks" : []}})
+    return stream_id
+
+
+def add_day(data, day=None, date=None, day_id=None):
+    day_id = day_id or shortuuid.uuid()
+    apply(data, {"op" : "add", "kind" : "day", "id" : day_id,
+                 "value" : {"day" : day, "date" : date, "blocks" : [], "streams" : []}})
+    return day_id
+
+
+def add_block(data, day_id, stream_id, game_id, round, start, end, block_id=None):
+    block_id = block_id or shortuuid.uuid()
+    apply(data, {"op" : "add", "kind" : "block", "id" : block_id, "day" : day_id, "stream" : stream_id,
+                 "value" : {"game" : game_id, "round" : round, "start" : start, "end" : end}})
+    return block_id
+
+
+def add_day_stream(data, day_id, stream_id):
+    if stream_id in data['days'][day_id]['streams']:
+        return False
+    apply(data, {"op" : "add_day_stream", "day" : day_id, "stream" : stream_id})
+    return True
+
+
+def remove_day_stream(data, day_id, stream_id):
+    apply(data, {"op" : "remove_day_stream", "day" : day_id, "stream" : stream_id})
+    return True
+
+
+def remove_zone(data, zone_id):
+    apply(data, {"op" : "remove", "kind" : "zone", "id" : zone_id})
+    return True
+
+
+def remove_game(data, game_id):
+    for block in data['blocks'].values():
+        if block['game'] == game_id:
+            return False
+    apply(data, {"op" : "remove", "kind" : "game", "id" : game_id})
+    return True
+
+
+def remove_stream(data, stream_id):
+    if len(data['streams'][stream_id]['blocks']) > 0:
+        return False
+    apply(data, {"op" : "remove", "kind" : "stream", "id" : stream_id})
+    return True
+
+
+def remove_day(data, day_id):
+    if len(data['days'][day_id]['streams']) > 0:
+        return False
+    apply(data, {"op" : "remove", "kind" : "day", "id" : day_id})
+    return True
+
+
+def remove_block(data, block_id):
+    apply(data, {"op" : "remove", "kind" : "block", "id" : block_id})
+    return True
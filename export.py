@@ -0,0 +1,157 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import data_management
+
+# Batch export of every (day, zone) schedule graphic through a process pool.
+# Workers get a compact JSON snapshot of the one day they draw, built with
+# renderer.describe_day, never the live model. A manifest of content hashes
+# in the output directory lets unchanged graphics be skipped.
+
+MANIFEST = "export_manifest.json"
+
+_renderer = None
+
+
+def _init_worker(packs=()):
+    global _renderer
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import pack
+    import renderer
+    for path in packs:
+        pack.mount(path)
+    _renderer = renderer.ScheduleRenderer()
+
+
+def render_job(path, snapshot):
+    start = time.perf_counter()
+    image = _renderer.render(json.loads(snapshot))[0]
+    if not image.save(path):
+        raise IOError("could not write %s" % path)
+    return path, time.perf_counter() - start
+
+
+def file_name(index, zone):
+    label = re.sub(r"[^A-Za-z0-9_-]+", "_", zone or "event").strip("_")
+    return "day%d_%s.png" % (index + 1, label)
+
+
+def logo_stamp(path):
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def build_jobs(data):
+    # [(file name, snapshot bytes, content hash)], built on the calling thread
+    import renderer
+    zone_ids = list(data['zones']) or [None]
+    jobs = []
+    names = set()
+    for index, day_id in enumerate(data['days']):
+        for zone_id in zone_ids:
+            view = renderer.describe_day(data, day_id, zone_id)
+            snapshot = json.dumps(view, separators=(",", ":"), sort_keys=True)
+            # ids do not change the picture (and older files get new ones per load)
+            content = dict(view, streams=[dict(stream, id=None, blocks=[dict(block, id=None) for block in stream['blocks']])
+                                          for stream in view['streams']])
+            digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8"))
+            logos = sorted({stream['logo'] or "" for stream in view['streams']} |
+                           {block['logo'] or "" for stream in view['streams'] for block in stream['blocks']})
+            digest.update(json.dumps([[logo, logo_stamp(logo)] for logo in logos]).encode("utf-8"))
+            zone = data['zones'][zone_id]['text'] or data['zones'][zone_id]['identifier'] if zone_id else None
+            name = file_name(index, zone)
+            while name in names:
+                name = name[:-4] + "_.png"
+            names.add(name)
+            jobs.append((name, snapshot, digest.hexdigest()))
+    return jobs
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return {}
+
+
+def run_jobs(jobs, output_dir, workers=None, force=False):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    pending = []
+    skipped = []
+    for name, snapshot, digest in jobs:
+        path = os.path.join(output_dir, name)
+        if not force and manifest.get(name) == digest and os.path.exists(path):
+            skipped.append(name)
+        else:
+            pending.append((name, snapshot, digest))
+
+    rendered = {}
+    failed = {}
+    try:
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, len(pending))
+            context = multiprocessing.get_context("spawn")
+            # logos from asset packs resolve only in packs the worker has mounted
+            import pack
+            packs = [opened.path for opened in pack.mounted]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                                        initargs=(packs,)) as pool:
+                futures = {pool.submit(render_job, os.path.join(output_dir, name), snapshot) : (name, digest)
+                           for name, snapshot, digest in pending}
+                for future in concurrent.futures.as_completed(futures):
+                    name, digest = futures[future]
+                    try:
+                        path, seconds = future.result()
+                    except Exception as e:
+                        # a failed graphic keeps no manifest entry, so it is retried next time
+                        manifest.pop(name, None)
+                        failed[name] = str(e) or type(e).__name__
+                        continue
+                    manifest[name] = digest
+                    rendered[name] = seconds
+    finally:
+        # record whatever finished, even if the pool itself broke
+        with open(os.path.join(output_dir, MANIFEST), 'w', encoding="utf-8") as outfile:
+            json.dump(manifest, outfile, indent=2, sort_keys=True)
+    return rendered, skipped, failed
+
+
+def export_schedule(data, output_dir, workers=None, force=False):
+    # (rendered {name: seconds}, skipped [name], failed {name: error})
+    return run_jobs(build_jobs(data), output_dir, workers, force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every day/zone schedule graphic in parallel.")
+    parser.add_argument("schedule")
+    parser.add_argument("output_dir")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render graphics even if unchanged")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    data = data_management.parseJSON2(data_management.loadJSON(args.schedule))
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    rendered, skipped, failed = export_schedule(data, args.output_dir, args.jobs, args.force)
+    for name, seconds in sorted(rendered.items()):
+        print("rendered %s (%.1fms)" % (name, seconds * 1000))
+    for name, error in sorted(failed.items()):
+        print("failed %s: %s" % (name, error), file=sys.stderr)
+    print("%d rendered, %d unchanged, %d failed, %.2fs" % (len(rendered), len(skipped), len(failed), time.perf_counter() - start))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import collections
+import http.server
+import json
+import os
+import threading
+import urllib.parse
+import uuid
+
+import data_management
+import tracing
+
+# Opt-in local HTTP feed of the live schedule for overlays and bots. The GUI
+# thread publishes immutable snapshots (data_management.dump_data output) and
+# the mutation records since the last one; server threads only read the
+# latest published snapshot, so requests never touch the editor's dicts or
+# the disk. Every record bumps the model version, which is the ETag of every
+# view; a poll with a matching If-None-Match is answered 304 with no body.
+# Every JSON body also carries the version it was built from.
+#
+#   GET /schedule              the whole schedule, as save_data writes it
+#   GET /event                 event fields, day list, games, streams, zones
+#   GET /days/<id>             one day with its streams and their blocks
+#   GET /streams/<id>          one stream with its blocks on each day
+#   GET /changes?since=<n>     mutation records after version n, in journal
+#                              format; 410 if n is no longer in the log
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("SCHEDULE_FEED_PORT", "8765"))
+LOG_SIZE = 5000
+
+
+class NotFound(Exception):
+    pass
+
+
+class Gone(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Snapshot:
+    # One published version of the model. Views are encoded on first request
+    # and reused by every later poll of the same version.
+    def __init__(self, session, version, schedule, changes, first):
+        self.session = session
+        self.version = version
+        self.schedule = schedule
+        self.changes = changes
+        self.first = first
+        self.etag = '"%s-%d"' % (session, version)
+        self.encoded = {}
+        self.lock = threading.Lock()
+
+    def view(self, path, query):
+        if path == "/changes":
+            # not cached, since differs per client
+            return self.changes_since(query)
+        with self.lock:
+            if path not in self.encoded:
+                self.encoded[path] = json.dumps(dict(self.build(path), version=self.version)).encode("utf-8")
+            return self.encoded[path]
+
+    def build(self, path):
+        event = self.schedule['event']
+        parts = path.strip("/").split("/")
+        if parts == ["schedule"]:
+            return self.schedule
+        if parts == ["event"]:
+            fields = {key : value for key, value in event.items() if key != "days"}
+            fields['days'] = [{"id" : day['id'], "day" : day['day'], "date" : day['date']} for day in event['days']]
+            return {"event" : fields}
+        if len(parts) == 2 and parts[0] == "days":
+            for day in event['days']:
+                if day['id'] == parts[1]:
+                    return {"day" : day}
+        if len(parts) == 2 and parts[0] == "streams":
+            for stream in event['streams']:
+                if stream['id'] == parts[1]:
+                    days = []
+                    for day in event['days']:
+                        for day_stream in day['streams']:
+                            if day_stream['id'] == parts[1]:
+                                days.append({"id" : day['id'], "day" : day['day'], "date" : day['date'],
+                                             "blocks" : day_stream['blocks']})
+                    return {"stream" : dict(stream, days=days)}
+        raise NotFound(path)
+
+    def changes_since(self, query):
+        try:
+            since = int(query.get("since", ["0"])[0])
+        except ValueError:
+            raise BadRequest("since must be a version number")
+        if since < self.first or since > self.version:
+            raise Gone(since)
+        changes = [{"version" : version, "record" : record} for version, record in self.changes if version > since]
+        return json.dumps({"version" : self.version, "changes" : changes}).encode("utf-8")
+
+
+class FeedHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        snapshot = self.server.feed.snapshot
+        url = urllib.parse.urlsplit(self.path)
+        if self.headers.get("If-None-Match") == snapshot.etag:
+            self.send_response(304)
+            self.send_header("ETag", snapshot.etag)
+            self.end_headers()
+            return
+        try:
+            body = snapshot.view(url.path, urllib.parse.parse_qs(url.query))
+        except NotFound:
+            self.send_error(404)
+            return
+        except BadRequest as e:
+            self.send_error(400, str(e))
+            return
+        except Gone:
+            # the client missed records, it has to refetch the views
+            body = json.dumps({"version" : snapshot.version}).encode("utf-8")
+            self.send_response(410)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", snapshot.etag)
+        self.send_header("Cache-Control", "no-cache")
+        # overlays are usually browser sources on another origin
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Feed:
+    # publish_later(callback) should call callback on the GUI thread soon, so
+    # bursts of edits publish once; without it every record publishes
+    def __init__(self, data, host=HOST, port=PORT, publish_later=None):
+        self.data = data
+        self.host = host
+        self.port = port
+        self.publish_later = publish_later
+        self.session = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.log = collections.deque(maxlen=LOG_SIZE)
+        self.pending = []
+        self.server = None
+        self.thread = None
+        self.publish()
+
+    def url(self):
+        return "http://%s:%d/" % (self.host, self.server.server_address[1])
+
+    def start(self):
+        # raises OSError if the port is taken
+        self.server = http.server.ThreadingHTTPServer((self.host, self.port), FeedHandler)
+        self.server.daemon_threads = True
+        self.server.feed = self
+        self.thread = threading.Thread(target=self.server.serve_forever, name="schedule-feed", daemon=True)
+        self.thread.start()
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        # records are reused by their callers, keep a detached copy
+        self.pending.append(json.loads(json.dumps(record)))
+        if self.publish_later is None:
+            self.publish()
+        elif len(self.pending) == 1:
+            self.publish_later(self.publish)
+
+    @tracing.traced("Feed.publish", "io")
+    def publish(self):
+        for record in self.pending:
+            self.version += 1
+            self.log.append((self.version, record))
+        self.pending = []
+        first = self.log[0][0] - 1 if self.log else self.version
+        # swapping the reference is atomic, handlers keep whichever snapshot
+        # they started with
+        self.snapshot = Snapshot(self.session, self.version, data_management.dump_data(self.data), tuple(self.log), first)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import data_management
+
+# Watches the open schedule file. When something else rewrites it, the file
+# is read and parsed on a pool thread and handed back to the GUI thread as a
+# freshly parsed model, ready for schedule_diff.sync.
+
+
+def file_hash(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+class ParseSignals(QObject):
+    parsed = pyqtSignal(str, str, object)
+    failed = pyqtSignal(str, str)
+
+
+class ParseTask(QRunnable):
+    def __init__(self, path, known):
+        super().__init__()
+        self.path = path
+        self.known = known
+        self.signals = ParseSignals()
+
+    def run(self):
+        try:
+            with open(self.path, 'rb') as infile:
+                content = infile.read()
+            digest = file_hash(content)
+            if digest == self.known:
+                self.signals.parsed.emit(self.path, digest, None)
+                return
+            data = data_management.parseJSON2(json.loads(content))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.signals.failed.emit(self.path, "%s: %s" % (type(e).__name__, e))
+            return
+        self.signals.parsed.emit(self.path, digest, data)
+
+
+class ScheduleWatcher(QObject):
+    reloaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.known = None
+        self.tasks = []
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.fileChanged)
+        # editors and scripts often write in several steps; wait for them to settle
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.reparse)
+
+    def watch(self, path):
+        # (re)start watching path; its current contents count as already loaded
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        self.path = path
+        self.known = None
+        if not path:
+            return
+        try:
+            with open(path, 'rb') as infile:
+                self.known = file_hash(infile.read())
+        except OSError:
+            pass
+        self.watcher.addPath(path)
+
+    def fileChanged(self, path):
+        # files replaced by rename drop out of the watcher
+        if path not in self.watcher.files() and os.path.exists(path):
+            self.watcher.addPath(path)
+        self.timer.start()
+
+    def reparse(self):
+        if not self.path:
+            return
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+        task = ParseTask(self.path, self.known)
+        task.signals.parsed.connect(self.parsed)
+        task.signals.failed.connect(self.parseFailed)
+        self.tasks.append(task)
+        QThreadPool.globalInstance().start(task)
+
+    def parsed(self, path, digest, data):
+        self.tasks = [task for task in self.tasks if task.signals is not self.sender()]
+        if path != self.path or digest == self.known:
+            return
+        self.known = digest
+        if data is not None:
+            self.reloaded.emit(data)
+
+    def parseFailed(self, path, message):
+        self.tasks = [task for task in self.tasks if task.signals is not self.sender()]
+        if path == self.path:
+            self.failed.emit(message)
@@ -0,0 +1,138 @@
+import re
+
+import data_management
+import time_management
+
+# Typo tolerant matching for the searchable dropdowns. Items are indexed by
+# the trigrams of their words, so "strt fghter 6" still shares most of its
+# trigrams with "Street Fighter 6". Candidates are scored by trigram overlap
+# (Dice coefficient) and only items sharing a trigram with the query are
+# looked at. The game and stream catalogs are shared by every dropdown of the
+# editor and follow the model through a mutation listener.
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text):
+    # each word padded so short words and word starts still produce grams
+    grams = set()
+    for word in WORD.findall((text or "").lower()):
+        padded = "  " + word + " "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self, items=()):
+        self.items = []
+        self.grams = {}
+        self.postings = {}
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return item in self.grams
+
+    def add(self, item):
+        if item in self.grams:
+            return
+        self.items.append(item)
+        self.grams[item] = trigrams(item)
+        for gram in self.grams[item]:
+            self.postings.setdefault(gram, set()).add(item)
+
+    def remove(self, item):
+        if item not in self.grams:
+            return
+        self.items.remove(item)
+        for gram in self.grams.pop(item):
+            self.postings[gram].discard(item)
+            if not self.postings[gram]:
+                del self.postings[gram]
+
+    def search(self, query, limit=50):
+        # items best matching query first; all items, in order, for an
+        # empty query
+        query_grams = trigrams(query)
+        if not query_grams:
+            return self.items[:limit]
+        shared = {}
+        for gram in query_grams:
+            for item in self.postings.get(gram, ()):
+                shared[item] = shared.get(item, 0) + 1
+        lowered = query.lower().strip()
+        scored = []
+        for item, count in shared.items():
+            score = 2.0 * count / (len(query_grams) + len(self.grams[item]))
+            text = item.lower()
+            # exact substrings and prefixes beat equally close fuzzy matches
+            if lowered in text:
+                score += 1.0 if text.startswith(lowered) else 0.5
+            scored.append((-score, len(item), item))
+        scored.sort()
+        return [item for score, length, item in scored[:limit]]
+
+
+class Catalogs:
+    def __init__(self):
+        self.data = None
+        self.indexes = {}
+
+    def watch(self, data):
+        self.data = data
+        self.rebuild()
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+
+    def rebuild(self):
+        self.indexes['games'] = TrigramIndex(self.data['game_map'].keys())
+        self.indexes['streams'] = TrigramIndex(self.data['stream_map'].keys())
+
+    def get(self, name, data=None):
+        # shared index for "games" or "streams" of data, or "zones"; None if
+        # data is not the watched model
+        if name == "zones":
+            if "zones" not in self.indexes:
+                self.indexes['zones'] = TrigramIndex(time_management.available_zones())
+            return self.indexes['zones']
+        if data is None or data is not self.data:
+            return None
+        return self.indexes[name]
+
+    def replace(self, name, key_map, old, new):
+        # moves an index from key old to key new, keeping old while another
+        # entity still maps to it
+        index = self.indexes[name]
+        if old is not None and old not in key_map:
+            index.remove(old)
+        if new is not None and new in key_map:
+            index.add(new)
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        op = record['op']
+        kind = record.get('kind')
+        if op == "reset":
+            self.rebuild()
+        elif kind == "game":
+            if op == "set" and record['key'] == "name":
+                self.replace("games", data['game_map'], record['old'], record['value'])
+            elif op == "add":
+                self.replace("games", data['game_map'], None, record['value']['name'])
+            elif op == "remove":
+                self.replace("games", data['game_map'], record['value']['name'], None)
+        elif kind == "stream":
+            if op == "set" and record['key'] in ("platform", "stream"):
+                stream = data['streams'][record['id']]
+                old = dict(stream, **{record['key'] : record['old']})
+                self.replace("streams", data['stream_map'], (old['platform'] or "") + (old['stream'] or ""),
+                             (stream['platform'] or "") + (stream['stream'] or ""))
+            elif op in ("add", "remove"):
+                link = (record['value']['platform'] or "") + (record['value']['stream'] or "")
+                self.replace("streams", data['stream_map'], link if op == "remove" else None, link if op == "add" else None)
+
+
+catalogs = Catalogs()
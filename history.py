@@ -0,0 +1,149 @@
+import collections
+import contextlib
+import json
+import os
+import time
+
+import data_management
+
+# Undo/redo built from the mutation records themselves. Every record carries
+# what it needs to be inverted (old values, removed objects and the list
+# positions they came from), so undoing costs the size of the edit, never a
+# copy of the schedule. Consecutive edits of the same field within
+# MERGE_SECONDS collapse into one step, and the oldest steps are dropped once
+# the stack outgrows its memory budget.
+
+BUDGET = int(os.environ.get("SCHEDULE_UNDO_BUDGET", str(16 * 1024 * 1024)))
+MERGE_SECONDS = 1.0
+
+
+def inverse(record):
+    op = record['op']
+    if op == "set":
+        return dict(record, value=record['old'], old=record['value'])
+    if op == "add":
+        return {"op" : "remove", "kind" : record['kind'], "id" : record['id']}
+    if op == "remove":
+        return dict(record, op="add")
+    if op == "add_day_stream":
+        return {"op" : "remove_day_stream", "day" : record['day'], "stream" : record['stream']}
+    if op == "remove_day_stream":
+        return {"op" : "add_day_stream", "day" : record['day'], "stream" : record['stream'], "index" : record['index']}
+    raise ValueError("cannot invert %r" % op)
+
+
+def record_size(record):
+    return len(json.dumps(record, separators=(",", ":")))
+
+
+class History:
+    def __init__(self, data, budget=BUDGET):
+        self.data = data
+        self.budget = budget
+        self.undoStack = collections.deque()
+        self.redoStack = []
+        self.size = 0
+        self.applying = False
+        self.pending = None
+        self.lastTime = 0
+        data_management.add_listener(self.record)
+
+    def shutdown(self):
+        data_management.remove_listener(self.record)
+
+    def clear(self):
+        self.undoStack.clear()
+        self.redoStack = []
+        self.size = 0
+
+    def canUndo(self):
+        return len(self.undoStack) > 0
+
+    def canRedo(self):
+        return len(self.redoStack) > 0
+
+    @contextlib.contextmanager
+    def group(self):
+        # records made inside the block undo and redo as one step
+        if self.pending is not None:
+            yield
+            return
+        self.pending = []
+        try:
+            yield
+        finally:
+            records = self.pending
+            self.pending = None
+            if records:
+                self.redoStack = []
+                self.push(records)
+
+    def record(self, data, record):
+        if data is not self.data or self.applying:
+            return
+        if record['op'] == "reset":
+            self.clear()
+            return
+        record = json.loads(json.dumps(record))
+        if self.pending is not None:
+            self.pending.append(record)
+            return
+        now = time.monotonic()
+        merged = self.merge(record, now)
+        self.lastTime = now
+        if not merged:
+            self.redoStack = []
+            self.push([record])
+
+    def merge(self, record, now):
+        if record['op'] != "set" or not self.undoStack or now - self.lastTime > MERGE_SECONDS:
+            return False
+        step = self.undoStack[-1]
+        last = step[-1]
+        if len(step) != 1 or last['op'] != "set" or \
+                (last['kind'], last['id'], last['key']) != (record['kind'], record['id'], record['key']):
+            return False
+        self.redoStack = []
+        self.size -= record_size(last)
+        if last['old'] == record['value']:
+            # typed back to where it started
+            self.undoStack.pop()
+            return True
+        step[0] = dict(last, value=record['value'])
+        self.size += record_size(step[0])
+        return True
+
+    def push(self, records):
+        self.undoStack.append(records)
+        self.size += sum(record_size(record) for record in records)
+        while self.size > self.budget and len(self.undoStack) > 1:
+            self.size -= sum(record_size(record) for record in self.undoStack.popleft())
+
+    def replay(self, records):
+        # applies the inverse of records, newest first; returns what was
+        # applied, which is in turn the step that reverses this one
+        applied = []
+        self.applying = True
+        try:
+            for record in reversed(records):
+                result = data_management.apply(self.data, inverse(record))
+                if result is not None:
+                    applied.append(json.loads(json.dumps(result)))
+        finally:
+            self.applying = False
+        self.lastTime = 0
+        return applied
+
+    def undo(self):
+        if not self.undoStack:
+            return False
+        records = self.undoStack.pop()
+        self.size -= sum(record_size(record) for record in records)
+        self.redoStack.append(self.replay(records))
+        return True
+
+    def redo(self):
+        if not self.redoStack:
+            return False
+        self.push(self.replay(self.redoStack.pop()))
+        return True
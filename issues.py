@@ -0,0 +1,89 @@
+import copy
+import json
+
+from PyQt6.QtCore import QObject, QThread, Qt, pyqtSignal
+from PyQt6.QtWidgets import QDockWidget, QListWidget, QListWidgetItem
+
+import data_management
+import validation
+
+# Dockable list of schedule problems. Validation runs on a worker thread
+# against its own copy of the model; the GUI thread only forwards mutation
+# records and applies the per-entity issue changes that come back.
+
+
+class ValidationWorker(QObject):
+    validated = pyqtSignal(object, bool)
+
+    def __init__(self):
+        super().__init__()
+        self.validator = None
+
+    def reset(self, data):
+        self.validator = validation.Validator(data)
+        self.validated.emit(self.validator.full(), True)
+
+    def update(self, record):
+        if self.validator is None:
+            return
+        changes = self.validator.update(record)
+        if changes:
+            self.validated.emit(changes, False)
+
+
+class IssuesDock(QDockWidget):
+    issueActivated = pyqtSignal(str, object)
+    requestReset = pyqtSignal(object)
+    requestUpdate = pyqtSignal(object)
+
+    def __init__(self, data, parent=None):
+        super().__init__("Issues", parent)
+        self.data = data
+        self.items = {}
+        self.List = QListWidget()
+        self.List.itemActivated.connect(self.activate)
+        self.setWidget(self.List)
+
+        self.thread = QThread(self)
+        self.worker = ValidationWorker()
+        self.worker.moveToThread(self.thread)
+        self.requestReset.connect(self.worker.reset)
+        self.requestUpdate.connect(self.worker.update)
+        self.worker.validated.connect(self.showIssues)
+        self.thread.start()
+
+        self.requestReset.emit(copy.deepcopy(self.data))
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+        self.thread.quit()
+        self.thread.wait()
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        if record['op'] == "reset":
+            self.requestReset.emit(copy.deepcopy(self.data))
+        else:
+            self.requestUpdate.emit(json.loads(json.dumps(record)))
+
+    def showIssues(self, changes, full):
+        if full:
+            self.List.clear()
+            self.items = {}
+        for entity, issues in changes.items():
+            for item in self.items.pop(entity, []):
+                self.List.takeItem(self.List.row(item))
+            if issues:
+                self.items[entity] = []
+                for issue in issues:
+                    item = QListWidgetItem(issue)
+                    item.setData(Qt.ItemDataRole.UserRole, entity)
+                    self.List.addItem(item)
+                    self.items[entity].append(item)
+        self.setWindowTitle("Issues (%d)" % self.List.count())
+
+    def activate(self, item):
+        kind, entity_id = item.data(Qt.ItemDataRole.UserRole)
+        self.issueActivated.emit(kind, entity_id)
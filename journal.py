@@ -0,0 +1,250 @@
+import glob
+import json
+import os
+import queue
+import threading
+
+import data_management
+import tracing
+
+# Crash-safe autosave. Every mutation record is appended to a journal file as
+# one JSON line, so an edit costs one small write no matter how big the
+# schedule is. Now and then the model is compacted into a full snapshot and
+# the journal restarts empty. Recovery loads the snapshot and replays the
+# journal through data_management.apply; this relies on saved ids being
+# reused on load.
+#
+# Each running editor journals to its own base path, keyed by its process id
+# and held under a lock file, so a second instance neither overwrites nor
+# offers to recover the first one's edits. Journals whose lock is free were
+# left by an editor that did not close cleanly.
+#
+# The GUI thread only encodes records and dumps snapshots; the writes, fsyncs
+# and file swaps run in order on a writer thread.
+#
+# Files, for a base path P:
+#   P.journal      first line {"op": "begin", "generation": n, "source": file}
+#                  then one mutation record per line
+#   P.<n>.json     snapshot the journal's records apply to, in save_data format
+#   P.lock         held while an editor is journaling to P
+
+COMPACT_EVERY = 500
+
+
+def default_directory():
+    # SCHEDULE_AUTOSAVE_DIR moves the autosaves, e.g. for benchmarks and tests
+    return os.environ.get("SCHEDULE_AUTOSAVE_DIR") or os.path.join(os.path.expanduser("~"), ".schedule_editor")
+
+
+def default_path():
+    return os.path.join(default_directory(), "autosave-%d" % os.getpid())
+
+
+def lock(path):
+    # exclusive lock on path's lock file, held until the returned file is
+    # closed; None if another editor holds it
+    handle = open(path + ".lock", 'a+')
+    try:
+        handle.seek(0)
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def unlock(path, handle):
+    handle.close()
+    try:
+        os.remove(path + ".lock")
+    except OSError:
+        pass
+
+
+def _replace(path, write):
+    temp = path + ".tmp"
+    with open(temp, 'w', encoding="utf-8") as outfile:
+        write(outfile)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(temp, path)
+
+
+def read_header(path):
+    # the journal's begin record, or None if there is nothing to recover
+    try:
+        with open(path + ".journal", encoding="utf-8") as infile:
+            header = json.loads(infile.readline())
+    except (OSError, ValueError):
+        return None
+    if header.get('op') != "begin":
+        return None
+    return header
+
+
+def has_edits(path):
+    # True if the journal holds edits newer than its snapshot
+    header = read_header(path)
+    if header is None:
+        return False
+    with open(path + ".journal", encoding="utf-8") as infile:
+        infile.readline()
+        return any(line.strip() for line in infile)
+
+
+@tracing.traced("journal.orphans", "io")
+def orphans(directory=None):
+    # (base path, lock) for each journal no running editor holds, newest
+    # first; the caller owns the locks
+    found = []
+    pattern = os.path.join(directory or default_directory(), "autosave*.journal")
+    for name in sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True):
+        path = name[:-len(".journal")]
+        handle = lock(path)
+        if handle is not None:
+            found.append((path, handle))
+    return found
+
+
+def discard(path):
+    header = read_header(path)
+    names = [path + ".journal"]
+    if header is not None:
+        names.append("%s.%d.json" % (path, header['generation']))
+    for name in names:
+        if os.path.exists(name):
+            os.remove(name)
+
+
+@tracing.traced("journal.recover", "io")
+def recover(path):
+    # Returns (data, source file) rebuilt from the snapshot and journal, or
+    # (None, None). A torn last line from a crash mid-write is ignored.
+    header = read_header(path)
+    if header is None:
+        return None, None
+    snapshot = "%s.%d.json" % (path, header['generation'])
+    data = data_management.parseJSON2(data_management.loadJSON(snapshot))
+    with open(path + ".journal", encoding="utf-8") as infile:
+        infile.readline()
+        for line in infile:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            data_management.apply(data, record)
+    return data, header.get('source')
+
+
+class Journal:
+    def __init__(self, path=None, compact_every=COMPACT_EVERY, fsync=False):
+        self.path = path or default_path()
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.data = None
+        self.source = None
+        self.generation = 0
+        self.count = 0
+        self.file = None
+        self.lock = None
+        self.queue = queue.Queue()
+        self.writer = None
+        self.error = None
+        header = read_header(self.path)
+        if header is not None:
+            self.generation = header['generation']
+
+    def start(self, data, source=None):
+        # Begin journaling data: snapshot it and follow its mutations.
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.lock = lock(self.path)
+        self.data = data
+        self.source = source
+        self.writer = threading.Thread(target=self.write, name="journal-writer", daemon=True)
+        self.writer.start()
+        self.compact()
+        data_management.add_listener(self.record)
+
+    def record(self, data, record):
+        if data is not self.data:
+            return
+        if record['op'] == "reset":
+            self.compact()
+            return
+        self.queue.put(("record", json.dumps(record, separators=(",", ":")) + "\n"))
+        self.count += 1
+        # compacting costs a full dump, so wait for at least as many edits as
+        # there are blocks; that keeps the cost per edit constant
+        if self.count >= max(self.compact_every, len(data['blocks'])):
+            self.compact()
+
+    @tracing.traced("journal.compact", "io")
+    def compact(self):
+        # records queued after this point go to the new generation's journal
+        self.generation += 1
+        self.count = 0
+        self.queue.put(("snapshot", (self.generation, self.source, data_management.dump_data(self.data))))
+
+    def write(self):
+        # writer thread: applies queued records and snapshots in order
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            try:
+                if item[0] == "record":
+                    if self.file is None:
+                        continue
+                    self.file.write(item[1])
+                    self.file.flush()
+                    if self.fsync:
+                        os.fsync(self.file.fileno())
+                else:
+                    self.write_snapshot(*item[1])
+            except (OSError, ValueError) as e:
+                # keep going, a later snapshot starts a fresh journal
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        # blocks until everything queued so far is on disk
+        self.queue.join()
+
+    @tracing.traced("journal.write_snapshot", "io")
+    def write_snapshot(self, generation, source, snapshot):
+        name = "%s.%d.json" % (self.path, generation)
+        _replace(name, lambda outfile: outfile.write(json.dumps(snapshot, indent=3)))
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        header = {"op" : "begin", "generation" : generation, "source" : source}
+        _replace(self.path + ".journal", lambda outfile: outfile.write(json.dumps(header) + "\n"))
+        self.file = open(self.path + ".journal", 'a', encoding="utf-8")
+        for old in glob.glob(glob.escape(self.path) + ".*.json"):
+            if old != name:
+                os.remove(old)
+
+    def close(self, discard=True):
+        # Stop journaling. On a clean exit the autosave is no longer needed.
+        data_management.remove_listener(self.record)
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if discard:
+            for name in [self.path + ".journal", "%s.%d.json" % (self.path, self.generation)]:
+                if os.path.exists(name):
+                    os.remove(name)
+        if self.lock is not None:
+            unlock(self.path, self.lock)
+            self.lock = None
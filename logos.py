@@ -0,0 +1,174 @@
+import collections
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import weakref
+
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+import data_management
+import pack
+import tracing
+
+# What the editor knows about logo files: existence, size, mtime and pixel
+# dimensions, probed for every game and stream logo in one batched pass on
+# load. Paths a mutation points a logo at are only marked, and probed in one
+# batch when one of them is first read, so typing a path costs no disk access.
+# Widgets get scaled images from here, so a missing file is one cached miss
+# instead of a failed open on every rebuild (slow on network drives). Decoded
+# images and pixmaps are keyed by a hash of the file's bytes, so byte-identical
+# logos under different paths (mirrored channels, copied game folders) are
+# decoded and held once.
+
+PROBE_THREADS = 8
+
+LogoInfo = collections.namedtuple("LogoInfo", ["path", "exists", "size", "mtime", "width", "height", "digest"])
+
+
+def content_digest(path):
+    with open(path, 'rb') as infile:
+        if os.fstat(infile.fileno()).st_size == 0:
+            return hashlib.blake2b(digest_size=16).hexdigest()
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.blake2b(mapped, digest_size=16).hexdigest()
+
+
+def probe(path, previous=None):
+    # previous is the last LogoInfo for path; its digest is reused while the
+    # file's size and mtime are unchanged
+    if pack.is_pack_path(path):
+        entry = pack.logo_entry(path)
+        raw = pack.read(path)
+        if raw is None:
+            return LogoInfo(path, False, None, None, None, None, None)
+        return LogoInfo(path, True, len(raw), None, entry and entry['width'], entry and entry['height'],
+                        hashlib.blake2b(raw, digest_size=16).hexdigest())
+    try:
+        stat = os.stat(path)
+        if previous is not None and previous.exists and (previous.size, previous.mtime) == (stat.st_size, stat.st_mtime_ns):
+            return previous
+        digest = content_digest(path)
+    except (OSError, TypeError, ValueError):
+        return LogoInfo(path, False, None, None, None, None, None)
+    # reads the header only, the image is not decoded
+    dimensions = QImageReader(path).size()
+    return LogoInfo(path, True, stat.st_size, stat.st_mtime_ns,
+                    dimensions.width() if dimensions.isValid() else None,
+                    dimensions.height() if dimensions.isValid() else None, digest)
+
+
+def referenced(data):
+    paths = [game['logo'] for game in data['games'].values()] + [stream['logo'] for stream in data['streams'].values()]
+    return [path for path in dict.fromkeys(paths) if path]
+
+
+class LogoRegistry:
+    def __init__(self):
+        self.entries = {}
+        self.images = {}
+        self.pixmaps = {}
+        self.data = None
+        self.listeners = []
+        # paths mutations pointed a logo at, probed in one batch when first read
+        self.dirty = set()
+
+    def add_listener(self, callback):
+        # callback(digests) hears of content no path points at any more; held
+        # weakly, so a cache going away needs no unregistering
+        self.listeners.append(weakref.WeakMethod(callback))
+
+    @tracing.traced("LogoRegistry.probe", "logo")
+    def probe(self, paths, force=False):
+        # stats paths in one batch; known paths are skipped unless forced
+        paths = [path for path in dict.fromkeys(paths) if path and (force or path not in self.entries)]
+        if not paths:
+            return
+        previous = [self.entries.get(path) for path in paths]
+        if len(paths) == 1:
+            results = [probe(paths[0], previous[0])]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(PROBE_THREADS, len(paths))) as pool:
+                results = list(pool.map(probe, paths, previous))
+        stale = set()
+        for info in results:
+            old = self.entries.get(info.path)
+            if old is not None and old.digest != info.digest:
+                stale.add(old.digest)
+            self.entries[info.path] = info
+        # drop decoded copies of content no path points at any more
+        stale -= {info.digest for info in self.entries.values()}
+        if stale:
+            self.images = {key : image for key, image in self.images.items() if key[0] not in stale}
+            self.pixmaps = {key : pixmap for key, pixmap in self.pixmaps.items() if key[0] not in stale}
+            for listener in list(self.listeners):
+                callback = listener()
+                if callback is None:
+                    self.listeners.remove(listener)
+                else:
+                    callback(stale)
+
+    def info(self, path):
+        if path in self.dirty or path not in self.entries:
+            paths = list(self.dirty) + [path]
+            self.dirty = set()
+            self.probe(paths, force=True)
+        return self.entries[path]
+
+    def exists(self, path):
+        return bool(path) and self.info(path).exists
+
+    def image(self, path, size=200):
+        # scaled image, or a null image for a missing file without touching disk
+        if not self.exists(path):
+            return QImage()
+        key = (self.entries[path].digest, size)
+        image = self.images.get(key)
+        if image is None:
+            image = pack.load_image(path, size)
+            self.images[key] = image
+        return image
+
+    def pixmap(self, path, size=200):
+        # one shared pixmap per distinct logo content and size
+        if not self.exists(path):
+            return QPixmap()
+        key = (self.entries[path].digest, size)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self.image(path, size))
+            self.pixmaps[key] = pixmap
+        return pixmap
+
+    def missing(self, data=None):
+        paths = referenced(data) if data is not None else list(self.entries)
+        return [path for path in paths if not self.exists(path)]
+
+    def watch(self, data):
+        # probe everything data references now, and new paths as they appear
+        self.data = data
+        self.probe(referenced(data))
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        op = record['op']
+        kind = record.get('kind')
+        if op == "reset":
+            # forced, so files changed on disk since they were first seen get
+            # their new digest; unchanged ones cost a stat
+            self.probe(referenced(data), force=True)
+        elif op == "set" and kind in ("game", "stream") and record['key'] == "logo":
+            # typing a path passes through many that are never read
+            self.dirty.discard(record['old'])
+            if record['value']:
+                self.dirty.add(record['value'])
+        elif op == "add" and kind in ("game", "stream") and record['value']['logo']:
+            self.dirty.add(record['value']['logo'])
+
+
+registry = LogoRegistry()
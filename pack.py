@@ -0,0 +1,223 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zipfile
+
+from PyQt6.QtCore import QBuffer, QIODevice, Qt
+from PyQt6.QtGui import QImage
+
+import data_management
+import tracing
+
+# Portable "save with assets" packs: one uncompressed zip holding the
+# schedule JSON plus every logo it uses, stored once under the hash of its
+# bytes, and a pre-scaled thumbnail of each. Logo paths in a pack's schedule
+# read "pack:logos/<sha1>.<ext>". Opened packs are memory-mapped and mounted;
+# images decode straight from the mapping, nothing is extracted to disk.
+# Because members are named by content, a path resolves in any mounted pack.
+
+PREFIX = "pack:"
+EXTENSION = ".schedpack"
+SCHEDULE = "schedule.json"
+MANIFEST = "manifest.json"
+THUMB_SIZE = 200
+
+mounted = []
+
+
+class Pack:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.file = open(self.path, 'rb')
+        self.map = None
+        self.members = {}
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            with zipfile.ZipFile(self.file) as archive:
+                for info in archive.infolist():
+                    if info.compress_type != zipfile.ZIP_STORED:
+                        raise ValueError("%s: %s is compressed, packs must be stored" % (path, info.filename))
+                    # member bytes follow the local header, whose name and
+                    # extra field lengths may differ from the central
+                    # directory's
+                    offset = info.header_offset
+                    name_length, extra_length = struct.unpack("<HH", self.map[offset + 26:offset + 30])
+                    start = offset + 30 + name_length + extra_length
+                    self.members[info.filename] = (start, info.file_size)
+            self.manifest = json.loads(self.read(MANIFEST)) if MANIFEST in self.members else {"logos" : {}}
+        except Exception:
+            self.close()
+            raise
+
+    def read(self, name):
+        start, size = self.members[name]
+        return self.map[start:start + size]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+def is_pack_path(path):
+    return isinstance(path, str) and path.startswith(PREFIX)
+
+
+def mount(path):
+    path = os.path.abspath(path)
+    for opened in mounted:
+        if opened.path == path:
+            return opened
+    opened = Pack(path)
+    mounted.append(opened)
+    return opened
+
+
+def unmount(path):
+    path = os.path.abspath(path)
+    for opened in list(mounted):
+        if opened.path == path:
+            mounted.remove(opened)
+            opened.close()
+
+
+def find(name):
+    for opened in mounted:
+        if name in opened.members:
+            return opened
+    return None
+
+
+def read(path):
+    # bytes of a pack: path, or None if no mounted pack has it
+    name = path[len(PREFIX):]
+    opened = find(name)
+    return opened.read(name) if opened is not None else None
+
+
+def thumbnail_name(path):
+    digest = os.path.splitext(os.path.basename(path[len(PREFIX):]))[0]
+    return "thumbs/%s.png" % digest
+
+
+def logo_entry(path):
+    # manifest entry of a pack: path (width, height, source), or None
+    digest = os.path.splitext(os.path.basename(path[len(PREFIX):]))[0]
+    for opened in mounted:
+        if digest in opened.manifest['logos']:
+            return opened.manifest['logos'][digest]
+    return None
+
+
+def load_image(path, size=None):
+    # Decodes a logo from a mounted pack or from disk. With a size, returns it
+    # scaled to fit, using the pack's thumbnail when that is big enough.
+    if is_pack_path(path):
+        raw = None
+        if size is not None and size <= THUMB_SIZE:
+            name = thumbnail_name(path)
+            opened = find(name)
+            raw = opened.read(name) if opened is not None else None
+        if raw is None:
+            raw = read(path)
+        image = QImage.fromData(raw) if raw is not None else QImage()
+    else:
+        image = QImage(path) if path else QImage()
+    if size is not None and not image.isNull():
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+def read_logo(path):
+    if is_pack_path(path):
+        return read(path)
+    try:
+        with open(path, 'rb') as infile:
+            return infile.read()
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def png_bytes(image):
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(buffer.data())
+
+
+@tracing.traced("pack.save_pack", "io")
+def save_pack(fileName, data):
+    # Writes data and its logos as a pack. Logos that cannot be read keep
+    # their original path. Returns the number of distinct logos stored.
+    references = {}
+    members = {}
+    manifest = {"logos" : {}}
+    paths = [game['logo'] for game in data['games'].values()] + [stream['logo'] for stream in data['streams'].values()]
+    for path in dict.fromkeys(paths):
+        raw = read_logo(path) if path else None
+        if raw is None:
+            continue
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest not in manifest['logos']:
+            extension = os.path.splitext(path)[1].lower() or ".png"
+            name = "logos/%s%s" % (digest, extension)
+            image = QImage.fromData(raw)
+            members[name] = raw
+            source = path
+            if is_pack_path(path):
+                source = (logo_entry(path) or {}).get('source', path)
+            entry = {"file" : name, "source" : source, "width" : image.width(), "height" : image.height()}
+            if not image.isNull():
+                thumb = image.scaled(THUMB_SIZE, THUMB_SIZE, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                members["thumbs/%s.png" % digest] = png_bytes(thumb)
+            manifest['logos'][digest] = entry
+        references[path] = PREFIX + manifest['logos'][digest]['file']
+
+    packed = dict(data)
+    packed['games'] = {game_id : dict(game, logo=references.get(game['logo'], game['logo'])) for game_id, game in data['games'].items()}
+    packed['streams'] = {stream_id : dict(stream, logo=references.get(stream['logo'], stream['logo'])) for stream_id, stream in data['streams'].items()}
+    schedule = json.dumps(data_management.dump_data(packed), indent=3).encode("utf-8")
+
+    temp = fileName + ".tmp"
+    with zipfile.ZipFile(temp, 'w', compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(SCHEDULE, schedule)
+        archive.writestr(MANIFEST, json.dumps(manifest, indent=1))
+        for name, raw in members.items():
+            archive.writestr(name, raw)
+    # a mapped file cannot be replaced on every platform
+    was_mounted = any(opened.path == os.path.abspath(fileName) for opened in mounted)
+    unmount(fileName)
+    os.replace(temp, fileName)
+    if was_mounted:
+        mount(fileName)
+    return len(manifest['logos'])
+
+
+@tracing.traced("pack.extract_logos", "io")
+def extract_logos(data, directory):
+    # Writes the pack: logos data uses into directory so a plain JSON save
+    # still finds them. Returns {pack path : extracted file}; paths no
+    # mounted pack has are left out.
+    extracted = {}
+    paths = [game['logo'] for game in data['games'].values()] + [stream['logo'] for stream in data['streams'].values()]
+    for path in dict.fromkeys(paths):
+        if not is_pack_path(path):
+            continue
+        raw = read(path)
+        if raw is None:
+            continue
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(os.path.abspath(directory), os.path.basename(path[len(PREFIX):]))
+        with open(target, 'wb') as outfile:
+            outfile.write(raw)
+        extracted[path] = target
+    return extracted
+
+
+@tracing.traced("pack.load_pack", "io")
+def load_pack(fileName):
+    # mounts the pack and returns its schedule parsed into a model
+    opened = mount(fileName)
+    return data_management.parseJSON2(json.loads(opened.read(SCHEDULE)))
@@ -0,0 +1,179 @@
+from PyQt6.QtCore import QObject, QRect, QThread, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter
+from PyQt6.QtWidgets import QComboBox, QDockWidget, QHBoxLayout, QScrollArea, QVBoxLayout, QWidget
+
+import data_management
+import renderer
+
+# Dockable live preview of the rendered day. Rendering runs on a worker
+# thread; the GUI thread only builds the day description and copies back the
+# patches the renderer reports as dirty, so typing in a block never waits on
+# a full redraw. Repaints are throttled to the display refresh rate.
+
+
+class RenderWorker(QObject):
+    rendered = pyqtSignal(object, object, list)
+
+    def __init__(self):
+        super().__init__()
+        self.renderer = None
+
+    def render(self, view, cache_key, full):
+        if self.renderer is None:
+            self.renderer = renderer.ScheduleRenderer()
+        image, dirty = self.renderer.render(view, cache_key)
+        if full:
+            dirty = [image.rect()]
+        patches = [(QRect(rect), image.copy(rect)) for rect in dirty]
+        self.rendered.emit(cache_key, image.size(), patches)
+
+
+class PreviewCanvas(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.image = QImage()
+        self.scale = 0.5
+
+    def applyPatches(self, size, patches):
+        if self.image.size() != size:
+            self.image = QImage(size, QImage.Format.Format_ARGB32_Premultiplied)
+            self.image.fill(Qt.GlobalColor.black)
+            self.setFixedSize(int(size.width() * self.scale), int(size.height() * self.scale))
+            self.update()
+        painter = QPainter(self.image)
+        for rect, patch in patches:
+            painter.drawImage(rect.topLeft(), patch)
+            self.update(QRect(int(rect.x() * self.scale), int(rect.y() * self.scale),
+                              int(rect.width() * self.scale) + 2, int(rect.height() * self.scale) + 2))
+        painter.end()
+
+    def paintEvent(self, event):
+        if self.image.isNull():
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.scale(self.scale, self.scale)
+        area = event.rect()
+        source = QRect(int(area.x() / self.scale), int(area.y() / self.scale),
+                       int(area.width() / self.scale) + 2, int(area.height() / self.scale) + 2)
+        painter.drawImage(source, self.image, source)
+        painter.end()
+
+
+class PreviewDock(QDockWidget):
+    requestRender = pyqtSignal(object, object, bool)
+
+    def __init__(self, data, parent=None):
+        super().__init__("Preview", parent)
+        self.data = data
+        self.dayID = None
+        self.zoneID = None
+        self.dirty = False
+        self.busy = False
+        self.cacheKey = None
+        self.shownKey = None
+
+        self.DaySelect = QComboBox()
+        self.ZoneSelect = QComboBox()
+        controls = QHBoxLayout()
+        controls.addWidget(self.DaySelect)
+        controls.addWidget(self.ZoneSelect)
+        self.Canvas = PreviewCanvas()
+        self.Scroll = QScrollArea()
+        self.Scroll.setWidget(self.Canvas)
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.Scroll)
+        container = QWidget()
+        container.setLayout(layout)
+        self.setWidget(container)
+        self.setMinimumWidth(450)
+
+        screen = QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen is not None else 60
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(max(1, int(1000 / (rate or 60))))
+        self.timer.timeout.connect(self.flush)
+
+        self.thread = QThread(self)
+        self.worker = RenderWorker()
+        self.worker.moveToThread(self.thread)
+        self.requestRender.connect(self.worker.render)
+        self.worker.rendered.connect(self.showRendered)
+        self.thread.start()
+
+        self.DaySelect.activated.connect(self.selectDayIndex)
+        self.ZoneSelect.activated.connect(self.selectZoneIndex)
+        self.fillSelectors()
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+        self.thread.quit()
+        self.thread.wait()
+
+    def fillSelectors(self):
+        self.DaySelect.clear()
+        for day_id, day in self.data['days'].items():
+            self.DaySelect.addItem("%s %s" % (day['day'] or "", day['date'] or ""), day_id)
+        self.ZoneSelect.clear()
+        self.ZoneSelect.addItem(self.data['event']['zone_text'] or self.data['event']['time zone'] or "Event zone", None)
+        for zone_id, zone in self.data['zones'].items():
+            self.ZoneSelect.addItem(zone['text'] or zone['identifier'] or zone_id, zone_id)
+        if self.dayID not in self.data['days']:
+            self.dayID = next(iter(self.data['days']), None)
+        if self.zoneID not in self.data['zones']:
+            self.zoneID = None
+        self.DaySelect.setCurrentIndex(max(0, self.DaySelect.findData(self.dayID)))
+        self.ZoneSelect.setCurrentIndex(max(0, self.ZoneSelect.findData(self.zoneID)))
+        self.schedule()
+
+    def selectDayIndex(self, index):
+        self.selectDay(self.DaySelect.itemData(index))
+
+    def selectZoneIndex(self, index):
+        self.zoneID = self.ZoneSelect.itemData(index)
+        self.schedule()
+
+    def selectDay(self, day_id):
+        if day_id == self.dayID:
+            return
+        self.dayID = day_id
+        self.DaySelect.setCurrentIndex(max(0, self.DaySelect.findData(day_id)))
+        self.schedule()
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        kind = record.get('kind')
+        if record['op'] == "reset" or kind in ("day", "zone") or (kind == "event" and record['key'] in ("zone_text", "time zone")):
+            self.fillSelectors()
+        else:
+            self.schedule()
+
+    def schedule(self):
+        self.dirty = True
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        if not self.dirty or self.dayID is None or self.dayID not in self.data['days']:
+            return
+        if self.busy:
+            return
+        if self.zoneID is not None and self.zoneID not in self.data['zones']:
+            self.zoneID = None
+        self.dirty = False
+        self.busy = True
+        self.cacheKey = (self.dayID, self.zoneID)
+        view = renderer.describe_day(self.data, self.dayID, self.zoneID)
+        self.requestRender.emit(view, self.cacheKey, self.cacheKey != self.shownKey)
+
+    def showRendered(self, cache_key, size, patches):
+        self.busy = False
+        if cache_key == self.cacheKey:
+            self.Canvas.applyPatches(size, patches)
+            self.shownKey = cache_key
+        if self.dirty:
+            self.timer.start()
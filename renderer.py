@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import os
+import sys
+
+from PyQt6.QtCore import Qt, QRect, QRectF
+from PyQt6.QtGui import QColor, QFont, QGuiApplication, QImage, QPainter
+
+import atlas
+import data_management
+import logos
+import time_management
+import tracing
+
+# Draws a day of the schedule into a QImage. Works without a window, so it
+# can run under the offscreen platform. Block tiles are cached by content
+# hash; re-rendering after an edit redraws only the tiles whose content
+# changed and composites them over the previous image.
+
+MARGIN = 40
+HEADER_HEIGHT = 160
+STREAM_HEADER_HEIGHT = 60
+COLUMN_WIDTH = 360
+COLUMN_GAP = 20
+TIME_AXIS_WIDTH = 90
+MINUTE_HEIGHT = 2
+MIN_TILE_HEIGHT = 28
+MIN_TILE_LOGO = 16
+BACKGROUND = "#1e1e24"
+FOREGROUND = "#f0f0f0"
+
+
+def ensure_app():
+    if QGuiApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        ensure_app.app = QGuiApplication(sys.argv[:1])
+    return QGuiApplication.instance()
+
+
+def describe_day(data, day_id, zone_id=None):
+    # Plain-data view of one day in one zone: everything the renderer draws
+    # and nothing else, so it can be hashed, pickled or sent to a worker.
+    event = data['event']
+    day = data['days'][day_id]
+    date = day['date']
+    if zone_id is not None:
+        zone = data['zones'][zone_id]
+        zone_text = zone['text'] or zone['identifier']
+        zone_key = (zone['identifier'], zone['format'])
+    else:
+        zone_text = event['zone_text'] or event['time zone']
+        zone_key = (event['time zone'], event['time format'])
+    day_blocks = set(day['blocks'])
+    streams = []
+    for stream_id in day['streams']:
+        stream = data['streams'][stream_id]
+        blocks = []
+        for block_id in stream['blocks']:
+            if block_id not in day_blocks:
+                continue
+            block = data['blocks'][block_id]
+            game = data['games'].get(block['game'], {"name" : None, "logo" : None, "color" : None})
+            start_text, end_text = time_management.format_block(data, block_id, zone_id, date)
+            blocks.append({
+                "id" : block_id,
+                "game" : game['name'],
+                "logo" : game['logo'],
+                "color" : game['color'],
+                "round" : block['round'],
+                "start" : block['start'],
+                "end" : block['end'],
+                "time_text" : "%s - %s" % (start_text, end_text),
+                "zone" : zone_key
+            })
+        streams.append({
+            "id" : stream_id,
+            "label" : "%s/%s" % (stream['platform'], stream['stream']),
+            "logo" : stream['logo'],
+            "blocks" : blocks
+        })
+    return {
+        "title_line1" : event['title_line1'],
+        "title_line2" : event['title_line2'],
+        "day" : day['day'],
+        "date" : date,
+        "zone_text" : zone_text,
+        "hours" : [time_management.format_time(data, minute, zone_id, date) for minute in range(0, 2881, 60)],
+        "streams" : streams
+    }
+
+
+def tile_key(block, width, height):
+    # the logo by content, so a file changed on disk renders anew
+    logo = logos.registry.info(block['logo']).digest if block['logo'] else None
+    content = repr((block['game'], block['round'], block['start'], block['end'], block['time_text'],
+                    block['color'], logo, block['zone'], width, height))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def tile_logo_size(height):
+    return min(height - 8, 80)
+
+
+def text_color(color):
+    color = QColor(color or "#808080")
+    luminance = 0.299 * color.red() + 0.587 * color.green() + 0.114 * color.blue()
+    return QColor("#000000") if luminance > 150 else QColor("#ffffff")
+
+
+class ScheduleRenderer:
+    def __init__(self):
+        ensure_app()
+        self.tiles = {}
+        self.backgrounds = {}
+        self.atlas = atlas.LogoAtlas()
+        self.composites = {}
+
+    def logo_requests(self, view, rects):
+        # every (logo, size) a render of view draws, so the atlas packs them
+        # in one pass
+        requests = [(stream['logo'], STREAM_HEADER_HEIGHT - 10) for stream in view['streams']]
+        for stream in view['streams']:
+            for block in stream['blocks']:
+                # tiles too short for a logo draw none
+                if block['id'] in rects and tile_logo_size(rects[block['id']].height()) >= MIN_TILE_LOGO:
+                    requests.append((block['logo'], tile_logo_size(rects[block['id']].height())))
+        return requests
+
+    def layout(self, view):
+        starts = []
+        ends = []
+        for stream in view['streams']:
+            for block in stream['blocks']:
+                if block['start'] is None or block['end'] is None:
+                    continue
+                end = block['start'] + time_management.block_length(block['start'], block['end'])
+                starts.append(block['start'])
+                ends.append(end)
+        first = (min(starts) // 60) * 60 if starts else 0
+        last = -(-max(ends) // 60) * 60 if ends else 60
+        width = MARGIN * 2 + TIME_AXIS_WIDTH + max(1, len(view['streams'])) * (COLUMN_WIDTH + COLUMN_GAP)
+        height = HEADER_HEIGHT + STREAM_HEADER_HEIGHT + (last - first) * MINUTE_HEIGHT + MARGIN * 2
+        rects = {}
+        for column, stream in enumerate(view['streams']):
+            x = MARGIN + TIME_AXIS_WIDTH + column * (COLUMN_WIDTH + COLUMN_GAP)
+            for block in stream['blocks']:
+                if block['start'] is None or block['end'] is None:
+                    continue
+                end = block['start'] + time_management.block_length(block['start'], block['end'])
+                y = HEADER_HEIGHT + STREAM_HEADER_HEIGHT + MARGIN + (block['start'] - first) * MINUTE_HEIGHT
+                h = max(MIN_TILE_HEIGHT, (end - block['start']) * MINUTE_HEIGHT)
+                rects[block['id']] = QRect(x, y, COLUMN_WIDTH, h)
+        return (width, height, first, last), rects
+
+    @tracing.traced("ScheduleRenderer.tile", "render")
+    def render_tile(self, block, width, height):
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        color = QColor(block['color'] or "#808080")
+        painter.setBrush(color)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawRoundedRect(QRectF(0, 0, width, height), 8, 8)
+
+        text_left = 10
+        logo_size = tile_logo_size(height)
+        if logo_size >= MIN_TILE_LOGO and self.atlas.draw(painter, 6, 0, block['logo'], logo_size, height):
+            text_left = logo_size + 14
+
+        painter.setPen(text_color(block['color']))
+        font = QFont()
+        font.setPixelSize(16)
+        font.setBold(True)
+        painter.setFont(font)
+        text_rect = QRect(text_left, 4, width - text_left - 8, height - 8)
+        lines = [block['game'] or "", block['round'] or "", block['time_text']]
+        if height < 60:
+            lines = [" - ".join(line for line in lines[:2] if line)]
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap, lines[0])
+        if len(lines) > 1:
+            font.setBold(False)
+            font.setPixelSize(14)
+            painter.setFont(font)
+            painter.drawText(text_rect.adjusted(0, 22, 0, 0), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, "\n".join(lines[1:]))
+        painter.end()
+        return image
+
+    def tile(self, block, rect):
+        key = tile_key(block, rect.width(), rect.height())
+        image = self.tiles.get(key)
+        if image is None:
+            image = self.render_tile(block, rect.width(), rect.height())
+            self.tiles[key] = image
+        return key, image
+
+    def draw_background(self, painter, view, geometry):
+        width, height, first, last = geometry
+        painter.fillRect(0, 0, width, height, QColor(BACKGROUND))
+        painter.setPen(QColor(FOREGROUND))
+        font = QFont()
+        font.setPixelSize(36)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.drawText(QRect(MARGIN, MARGIN, width - 2 * MARGIN, 44), Qt.AlignmentFlag.AlignLeft, view['title_line1'] or "")
+        font.setPixelSize(24)
+        font.setBold(False)
+        painter.setFont(font)
+        painter.drawText(QRect(MARGIN, MARGIN + 46, width - 2 * MARGIN, 32), Qt.AlignmentFlag.AlignLeft, view['title_line2'] or "")
+        subtitle = " ".join(part for part in [view['day'], view['date'], view['zone_text']] if part)
+        painter.drawText(QRect(MARGIN, MARGIN + 80, width - 2 * MARGIN, 32), Qt.AlignmentFlag.AlignLeft, subtitle)
+
+        font.setPixelSize(14)
+        painter.setFont(font)
+        top = HEADER_HEIGHT + STREAM_HEADER_HEIGHT + MARGIN
+        grid = QColor(FOREGROUND)
+        grid.setAlpha(40)
+        for minute in range(first, last + 1, 60):
+            y = top + (minute - first) * MINUTE_HEIGHT
+            painter.setPen(grid)
+            painter.drawLine(MARGIN + TIME_AXIS_WIDTH, y, width - MARGIN, y)
+            painter.setPen(QColor(FOREGROUND))
+            painter.drawText(QRect(MARGIN, y - 10, TIME_AXIS_WIDTH - 10, 20), Qt.AlignmentFlag.AlignRight, view['hours'][minute // 60])
+
+        for column, stream in enumerate(view['streams']):
+            x = MARGIN + TIME_AXIS_WIDTH + column * (COLUMN_WIDTH + COLUMN_GAP)
+            left = x
+            drawn = self.atlas.draw(painter, x, HEADER_HEIGHT + 5, stream['logo'], STREAM_HEADER_HEIGHT - 10)
+            if drawn:
+                left += drawn + 8
+            font.setPixelSize(18)
+            font.setBold(True)
+            painter.setFont(font)
+            painter.drawText(QRect(left, HEADER_HEIGHT, x + COLUMN_WIDTH - left, STREAM_HEADER_HEIGHT), Qt.AlignmentFlag.AlignVCenter, stream['label'])
+
+    @tracing.traced("ScheduleRenderer.render", "render")
+    def render(self, view, cache_key=None):
+        # Returns (image, dirty rects). With a cache_key, the image from the last
+        # render under that key is updated in place: only tiles whose content or
+        # position changed are redrawn, over the cached background.
+        geometry, rects = self.layout(view)
+        self.atlas.ensure(self.logo_requests(view, rects))
+        placed = {}
+        tiles = {}
+        for stream in view['streams']:
+            for block in stream['blocks']:
+                if block['id'] in rects:
+                    key, tiles[block['id']] = self.tile(block, rects[block['id']])
+                    placed[block['id']] = (key, rects[block['id']])
+        background_key, background = self.render_background(view, geometry)
+
+        previous = self.composites.get(cache_key) if cache_key is not None else None
+        if previous is not None and previous['background'] == background_key:
+            dirty = []
+            for old, new in [(previous['tiles'], placed), (placed, previous['tiles'])]:
+                for block_id, (key, rect) in old.items():
+                    if new.get(block_id) != (key, rect) and rect not in dirty:
+                        dirty.append(rect)
+            image = previous['image']
+            if dirty:
+                painter = QPainter(image)
+                for rect in dirty:
+                    painter.drawImage(rect, background, rect)
+                for block_id, (key, rect) in placed.items():
+                    if any(rect.intersects(area) for area in dirty):
+                        painter.drawImage(rect.topLeft(), tiles[block_id])
+                painter.end()
+            previous['tiles'] = placed
+            return image, dirty
+
+        image = background.copy()
+        painter = QPainter(image)
+        for block_id, (key, rect) in placed.items():
+            painter.drawImage(rect.topLeft(), tiles[block_id])
+        painter.end()
+        if cache_key is not None:
+            self.composites[cache_key] = {"image" : image, "tiles" : placed, "background" : background_key}
+        self.prune()
+        return image, [image.rect()]
+
+    def prune(self, limit=4096):
+        # Backgrounds are full-size images, so one no composite uses (replaced
+        # after a title or geometry change, or from an uncached render) is
+        # dropped right away. Tiles are small and only pruned past limit.
+        backgrounds = {composite['background'] for composite in self.composites.values()}
+        for key in [key for key in self.backgrounds if key not in backgrounds]:
+            self.backgrounds.pop(key)
+        if len(self.tiles) <= limit:
+            return
+        keep = set()
+        for composite in self.composites.values():
+            keep.update(key for key, rect in composite['tiles'].values())
+        for key in [key for key in self.tiles if key not in keep]:
+            self.tiles.pop(key)
+
+    def render_background(self, view, geometry):
+        key = (repr(geometry), view['title_line1'], view['title_line2'], view['day'], view['date'], view['zone_text'],
+               tuple(view['hours']), tuple((stream['label'], stream['logo']) for stream in view['streams']))
+        image = self.backgrounds.get(key)
+        if image is None:
+            width, height = geometry[0], geometry[1]
+            image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+            painter = QPainter(image)
+            self.draw_background(painter, view, geometry)
+            painter.end()
+            self.backgrounds[key] = image
+        return key, image
+
+    def render_day(self, data, day_id, zone_id=None):
+        image, dirty = self.render(describe_day(data, day_id, zone_id), (day_id, zone_id))
+        return image
+
+    def forget(self, cache_key=None):
+        if cache_key is None:
+            self.composites.clear()
+        else:
+            self.composites.pop(cache_key, None)
+        self.prune()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render schedule day graphics to PNG.")
+    parser.add_argument("schedule")
+    parser.add_argument("output_dir")
+    parser.add_argument("--zone", help="zone identifier to render in (default: event time zone)")
+    args = parser.parse_args(argv)
+
+    data = data_management.parseJSON2(data_management.loadJSON(args.schedule))
+    zone_id = None
+    if args.zone:
+        zone_id = next((zone_id for zone_id, zone in data['zones'].items() if zone['identifier'] == args.zone), None)
+        if zone_id is None:
+            parser.error("%s has no zone with identifier %s" % (args.schedule, args.zone))
+    os.makedirs(args.output_dir, exist_ok=True)
+    renderer = ScheduleRenderer()
+    for index, day_id in enumerate(data['days']):
+        image = renderer.render_day(data, day_id, zone_id)
+        image.save(os.path.join(args.output_dir, "day%d.png" % (index + 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import data_management
+
+# Compares two loaded schedules by natural identity rather than by the ids
+# parseJSON2 mints: games by name, streams by platform+channel, days by date,
+# blocks by (day date, stream, start), zones by identifier. A block whose start
+# moved is paired with its old key by (day, stream, game, round), so a retime
+# is a change rather than a removal plus an addition. apply() and sync() make
+# the differences on a live model as ordinary mutations; schedule_merge builds
+# three-way merges on the same keys.
+
+EVENT_KEYS = ["name", "dates", "location", "twitter", "hashtag", "time zone", "scheduler", "zone_text",
+              "time format", "title_line1", "title_line2", "official_schedule"]
+# fields compared per kind, beyond the natural key itself
+FIELDS = {"games" : ["logo", "color"], "streams" : ["logo"], "zones" : ["text", "format"], "days" : ["day"]}
+
+
+def stream_key(stream):
+    return (stream['platform'] or "") + (stream['stream'] or "")
+
+
+def zone_key(zone):
+    return zone['identifier'] or zone['text'] or ""
+
+
+def day_key(day_id, day):
+    # undated days have no natural identity beyond their position
+    return day['date'] or ("", day['day'], day_id)
+
+
+def natural_index(data):
+    games = {}
+    for game_id, game in data['games'].items():
+        games.setdefault(game['name'], game_id)
+    streams = {}
+    for stream_id, stream in data['streams'].items():
+        streams.setdefault(stream_key(stream), stream_id)
+    zones = {}
+    for zone_id, zone in data['zones'].items():
+        zones.setdefault(zone_key(zone), zone_id)
+    days = {}
+    blocks = {}
+    for day_id, day in data['days'].items():
+        key = day_key(day_id, day)
+        if key in days:
+            continue
+        days[key] = day_id
+        day_blocks = set(day['blocks'])
+        for stream_id in day['streams']:
+            stream = data['streams'][stream_id]
+            seen = {}
+            for block_id in stream['blocks']:
+                if block_id not in day_blocks:
+                    continue
+                start = data['blocks'][block_id]['start']
+                count = seen.get(start, 0)
+                seen[start] = count + 1
+                blocks[(key, stream_key(stream), start, count)] = block_id
+    return {"games" : games, "streams" : streams, "zones" : zones, "days" : days, "blocks" : blocks}
+
+
+def block_values(data, block_id):
+    block = data['blocks'][block_id]
+    game = data['games'].get(block['game'])
+    return {"game" : game['name'] if game else None, "round" : block['round'], "end" : block['end']}
+
+
+def diff(old, new):
+    # {"event": {key: (old, new)}, kind: {"added": [...], "removed": [...], "changed": {key: {field: (old, new)}}}}
+    old_index = natural_index(old)
+    new_index = natural_index(new)
+    result = {"event" : {}}
+    for key in EVENT_KEYS:
+        if old['event'].get(key) != new['event'].get(key):
+            result['event'][key] = (old['event'].get(key), new['event'].get(key))
+
+    for kind, names in FIELDS.items():
+        old_keys = old_index[kind]
+        new_keys = new_index[kind]
+        changed = {}
+        for key in old_keys.keys() & new_keys.keys():
+            before = old[kind][old_keys[key]]
+            after = new[kind][new_keys[key]]
+            delta = {name : (before.get(name), after.get(name)) for name in names if before.get(name) != after.get(name)}
+            if delta:
+                changed[key] = delta
+        result[kind] = {"added" : [key for key in new_keys if key not in old_keys],
+                        "removed" : [key for key in old_keys if key not in new_keys],
+                        "changed" : changed}
+
+    old_blocks = old_index['blocks']
+    new_blocks = new_index['blocks']
+    changed = {}
+    for key in old_blocks.keys() & new_blocks.keys():
+        before = block_values(old, old_blocks[key])
+        after = block_values(new, new_blocks[key])
+        delta = {name : (before[name], after[name]) for name in before if before[name] != after[name]}
+        if delta:
+            changed[key] = delta
+    added = [key for key in new_blocks if key not in old_blocks]
+    removed = [key for key in old_blocks if key not in new_blocks]
+    buckets = {}
+    for key in added:
+        values = block_values(new, new_blocks[key])
+        buckets.setdefault((key[0], key[1], values['game'], values['round']), []).append(key)
+    moved = {}
+    for key in removed:
+        values = block_values(old, old_blocks[key])
+        bucket = buckets.get((key[0], key[1], values['game'], values['round']))
+        if bucket:
+            moved[key] = bucket.pop(0)
+            after = block_values(new, new_blocks[moved[key]])
+            delta = {"start" : (key[2], moved[key][2])}
+            delta.update({name : (values[name], after[name]) for name in values if values[name] != after[name]})
+            changed[key] = delta
+    targets = set(moved.values())
+    result['blocks'] = {"added" : [key for key in added if key not in targets],
+                        "removed" : [key for key in removed if key not in moved],
+                        "changed" : changed,
+                        "moved" : moved}
+
+    day_streams = {"added" : [], "removed" : []}
+    for key in old_index['days'].keys() & new_index['days'].keys():
+        before = [stream_key(old['streams'][s]) for s in old['days'][old_index['days'][key]]['streams']]
+        after = [stream_key(new['streams'][s]) for s in new['days'][new_index['days'][key]]['streams']]
+        day_streams['added'] += [(key, link) for link in after if link not in before]
+        day_streams['removed'] += [(key, link) for link in before if link not in after]
+    for key in new_index['days'].keys() - old_index['days'].keys():
+        day_streams['added'] += [(key, stream_key(new['streams'][s])) for s in new['days'][new_index['days'][key]]['streams']]
+    result['day_streams'] = day_streams
+    return result
+
+
+def is_empty(changes):
+    if changes['event']:
+        return False
+    return not any(changes[kind][part] for kind in ["games", "streams", "zones", "days", "blocks", "day_streams"]
+                   for part in changes[kind])
+
+
+def sync(data, new):
+    # Applies the difference between data and new to data, in place, through
+    # data_management mutations. Returns the diff that was applied.
+    changes = diff(data, new)
+    if not is_empty(changes):
+        apply(data, changes, new)
+    return changes
+
+
+def apply(data, changes, new, aliases=None):
+    # Makes changes, a diff whose "new" side is new, on data. Keys are looked
+    # up in data's natural index; aliases maps block keys of the diff's old
+    # side to the key the same block has in data, when they differ.
+    index = natural_index(data)
+    new_index = natural_index(new)
+    for key, alias in (aliases or {}).items():
+        if alias in index['blocks']:
+            index['blocks'][key] = index['blocks'][alias]
+
+    for key, (before, after) in changes['event'].items():
+        data_management.update_event(data, key, after)
+
+    for key in changes['zones']['added']:
+        zone = new['zones'][new_index['zones'][key]]
+        index['zones'][key] = data_management.add_zone(data, zone['text'], zone['identifier'], zone['format'])
+    for key, delta in changes['zones']['changed'].items():
+        for name, (before, after) in delta.items():
+            data_management.update_zone(data, index['zones'][key], name, after)
+
+    for key in changes['games']['added']:
+        game = new['games'][new_index['games'][key]]
+        index['games'][key] = data_management.add_game(data, game['name'], game['logo'], game['color'])
+    for key, delta in changes['games']['changed'].items():
+        for name, (before, after) in delta.items():
+            data_management.update_game(data, index['games'][key], name, after)
+
+    for key in changes['streams']['added']:
+        stream = new['streams'][new_index['streams'][key]]
+        index['streams'][key] = data_management.add_stream(data, stream['platform'], stream['stream'], stream['logo'])
+    for key, delta in changes['streams']['changed'].items():
+        for name, (before, after) in delta.items():
+            data_management.update_stream(data, index['streams'][key], name, after)
+
+    for key in changes['days']['added']:
+        day = new['days'][new_index['days'][key]]
+        index['days'][key] = data_management.add_day(data, day['day'], day['date'])
+    for key, delta in changes['days']['changed'].items():
+        for name, (before, after) in delta.items():
+            data_management.update_day(data, index['days'][key], name, after)
+    for key, link in changes['day_streams']['added']:
+        data_management.add_day_stream(data, index['days'][key], index['streams'][link])
+
+    for key in changes['blocks']['removed']:
+        data_management.remove_block(data, index['blocks'][key])
+    for key in changes['blocks']['added']:
+        day, link, start, count = key
+        values = block_values(new, new_index['blocks'][key])
+        block = new['blocks'][new_index['blocks'][key]]
+        data_management.add_block(data, index['days'][day], index['streams'][link], index['games'].get(values['game']),
+                                  block['round'], start, block['end'])
+    for key, delta in changes['blocks']['changed'].items():
+        block_id = index['blocks'][key]
+        for name, (before, after) in delta.items():
+            if name == "game":
+                after = index['games'].get(after)
+            data_management.update_block(data, block_id, name, after)
+
+    for key, link in changes['day_streams']['removed']:
+        if key in new_index['days']:
+            data_management.remove_day_stream(data, index['days'][key], index['streams'][link])
+    for key in changes['days']['removed']:
+        day_id = index['days'][key]
+        for stream_id in list(data['days'][day_id]['streams']):
+            data_management.remove_day_stream(data, day_id, stream_id)
+        data_management.remove_day(data, day_id)
+    for key in changes['streams']['removed']:
+        data_management.remove_stream(data, index['streams'][key])
+    for key in changes['games']['removed']:
+        data_management.remove_game(data, index['games'][key])
+    for key in changes['zones']['removed']:
+        data_management.remove_zone(data, index['zones'][key])
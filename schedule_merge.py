@@ -0,0 +1,244 @@
+import argparse
+import copy
+import sys
+
+import data_management
+import schedule_diff
+import time_management
+
+# Three-way merge of schedules on schedule_diff's natural keys (games by name,
+# streams by platform+channel, days by date, blocks by day, stream and start,
+# retimed blocks paired back to their old key). Both sides are diffed against
+# the base; their changes are taken where ours did not touch the same field,
+# and everything ours changed wins, with a conflict reported when theirs
+# changed it differently. The result is applied with schedule_diff.apply, so
+# merging into the live model is a run of ordinary mutations.
+
+
+def conflict_record(kind, key, field, base, ours, theirs, reason):
+    return {"key" : (kind, key), "field" : field, "base" : base, "ours" : ours, "theirs" : theirs, "reason" : reason}
+
+
+def block_usage(ours, ours_index, blocks):
+    # how many of our blocks the merge keeps on each day, stream, (day,
+    # stream) pair and game, with the games theirs reassigns taken as merged;
+    # one pass over the blocks
+    usage = {"days" : {}, "streams" : {}, "day_streams" : {}, "games" : {}}
+    removed = set(blocks['removed'])
+    for key, block_id in ours_index['blocks'].items():
+        if key in removed:
+            continue
+        delta = blocks['changed'].get(key, {})
+        game = delta['game'][1] if "game" in delta else schedule_diff.block_values(ours, block_id)['game']
+        for kind, used in [("days", key[0]), ("streams", key[1]), ("day_streams", (key[0], key[1])), ("games", game)]:
+            usage[kind][used] = usage[kind].get(used, 0) + 1
+    return usage
+
+
+def merge_changes(base, ours, theirs):
+    # Returns (changes, aliases, conflicts): the part of diff(base, theirs) to
+    # apply to ours, the block keys ours retimed, and the conflicts found.
+    ours_changes = schedule_diff.diff(base, ours)
+    theirs_changes = schedule_diff.diff(base, theirs)
+    ours_index = schedule_diff.natural_index(ours)
+    theirs_index = schedule_diff.natural_index(theirs)
+    conflicts = []
+    changes = {"event" : {}}
+
+    for key, (before, after) in theirs_changes['event'].items():
+        if key not in ours_changes['event']:
+            changes['event'][key] = (before, after)
+        elif ours_changes['event'][key][1] != after:
+            conflicts.append(conflict_record("event", key, None, before, ours_changes['event'][key][1], after, "changed on both sides"))
+
+    # blocks first, removals of days, streams and games depend on them
+    ours_blocks = ours_changes['blocks']
+    theirs_blocks = theirs_changes['blocks']
+    blocks = {"added" : [], "removed" : [], "changed" : {}, "moved" : {}}
+    for key in theirs_blocks['removed']:
+        if key in ours_blocks['removed']:
+            continue
+        if key in ours_blocks['changed']:
+            conflicts.append(conflict_record("block", key, None, None, ours_blocks['changed'][key], None,
+                                             "removed on one side and changed on the other"))
+            continue
+        blocks['removed'].append(key)
+    for key in theirs_blocks['added']:
+        if key in ours_index['blocks']:
+            mine = schedule_diff.block_values(ours, ours_index['blocks'][key])
+            other = schedule_diff.block_values(theirs, theirs_index['blocks'][key])
+            if mine != other:
+                conflicts.append(conflict_record("block", key, None, None, mine, other, "added on both sides"))
+            continue
+        blocks['added'].append(key)
+    for key, delta in theirs_blocks['changed'].items():
+        if key in ours_blocks['removed']:
+            conflicts.append(conflict_record("block", key, None, None, None, delta, "removed on one side and changed on the other"))
+            continue
+        mine = ours_blocks['changed'].get(key, {})
+        kept = {}
+        for name, (before, after) in delta.items():
+            if name not in mine:
+                kept[name] = (before, after)
+            elif mine[name][1] != after:
+                reason = "retimed differently on both sides" if name in ("start", "end") else "changed on both sides"
+                conflicts.append(conflict_record("block", key, name, before, mine[name][1], after, reason))
+        if kept:
+            blocks['changed'][key] = kept
+            if "start" in kept:
+                blocks['moved'][key] = theirs_blocks['moved'][key]
+    changes['blocks'] = blocks
+    usage = block_usage(ours, ours_index, blocks)
+
+    for kind, names in schedule_diff.FIELDS.items():
+        mine = ours_changes[kind]
+        other = theirs_changes[kind]
+        merged = {"added" : [], "removed" : [], "changed" : {}}
+        for key in other['added']:
+            if key in ours_index[kind]:
+                ours_values = {name : ours[kind][ours_index[kind][key]].get(name) for name in names}
+                theirs_values = {name : theirs[kind][theirs_index[kind][key]].get(name) for name in names}
+                if ours_values != theirs_values:
+                    conflicts.append(conflict_record(kind[:-1], key, None, None, ours_values, theirs_values, "added on both sides"))
+                continue
+            merged['added'].append(key)
+        for key in other['removed']:
+            if key in mine['removed']:
+                continue
+            if key in mine['changed']:
+                conflicts.append(conflict_record(kind[:-1], key, None, None, mine['changed'][key], None,
+                                                 "removed on one side and changed on the other"))
+                continue
+            kept = usage.get(kind, {}).get(key, 0)
+            if kept:
+                conflicts.append(conflict_record(kind[:-1], key, None, None, None, None,
+                                                 "removed by the other side but still used by %d blocks" % kept))
+                continue
+            merged['removed'].append(key)
+        for key, delta in other['changed'].items():
+            if key in mine['removed']:
+                conflicts.append(conflict_record(kind[:-1], key, None, None, None, delta, "removed on one side and changed on the other"))
+                continue
+            ours_delta = mine['changed'].get(key, {})
+            kept = {}
+            for name, (before, after) in delta.items():
+                if name not in ours_delta:
+                    kept[name] = (before, after)
+                elif ours_delta[name][1] != after:
+                    conflicts.append(conflict_record(kind[:-1], key, name, before, ours_delta[name][1], after, "changed on both sides"))
+            if kept:
+                merged['changed'][key] = kept
+        changes[kind] = merged
+
+    # blocks added by theirs need their day and stream on our side
+    for key in list(changes['blocks']['added']):
+        day, link = key[0], key[1]
+        if (day not in ours_index['days'] and day not in changes['days']['added']) or \
+           (link not in ours_index['streams'] and link not in changes['streams']['added']):
+            changes['blocks']['added'].remove(key)
+            conflicts.append(conflict_record("block", key, None, None, None, None, "added on a day or stream removed by the other side"))
+
+    day_streams = {"added" : [], "removed" : []}
+    ours_links = {key : [schedule_diff.stream_key(ours['streams'][stream_id]) for stream_id in ours['days'][day_id]['streams']]
+                  for key, day_id in ours_index['days'].items()}
+    for day, link in theirs_changes['day_streams']['added']:
+        if link in ours_links.get(day, []):
+            continue
+        if (day not in ours_index['days'] and day not in changes['days']['added']) or \
+           (link not in ours_index['streams'] and link not in changes['streams']['added']):
+            conflicts.append(conflict_record("day", day, "streams", None, None, link, "stream added to a day or stream removed by the other side"))
+            continue
+        day_streams['added'].append((day, link))
+    for day, link in theirs_changes['day_streams']['removed']:
+        if link not in ours_links.get(day, []):
+            continue
+        kept = usage['day_streams'].get((day, link), 0)
+        if kept:
+            conflicts.append(conflict_record("day", day, "streams", link, link, None,
+                                             "stream removed by the other side but still has %d blocks" % kept))
+            continue
+        day_streams['removed'].append((day, link))
+    changes['day_streams'] = day_streams
+    return changes, ours_blocks['moved'], conflicts
+
+
+def merge(base, ours, theirs):
+    # Three-way merge of parsed models. Returns (merged model, conflicts);
+    # ours is left untouched and conflicting fields keep our value.
+    changes, aliases, conflicts = merge_changes(base, ours, theirs)
+    merged = copy.deepcopy(ours)
+    if not schedule_diff.is_empty(changes):
+        schedule_diff.apply(merged, changes, theirs, aliases)
+    return merged, conflicts
+
+
+def describe_day(key):
+    if isinstance(key, tuple):
+        return key[1] or "day %s" % key[2]
+    return key
+
+
+def describe_key(key):
+    kind, key = key
+    if kind == "block":
+        return "block %s %s %s" % (describe_day(key[0]), key[1], time_management.minutes_to_time(key[2]) or "")
+    if kind == "day":
+        return "day %s" % describe_day(key)
+    return "%s %s" % (kind, key)
+
+
+def describe_conflict(conflict):
+    field = " %s" % conflict['field'] if conflict['field'] else ""
+    return "%s%s: %s (base %r, ours %r, theirs %r)" % (describe_key(conflict['key']), field, conflict['reason'],
+                                                       conflict['base'], conflict['ours'], conflict['theirs'])
+
+
+def load(path):
+    return data_management.parseJSON2(data_management.loadJSON(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff or three-way merge schedule files by natural identity.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff_parser = commands.add_parser("diff", help="list differences between two schedules")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    merge_parser = commands.add_parser("merge", help="three-way merge of two edited copies of a base schedule")
+    merge_parser.add_argument("base")
+    merge_parser.add_argument("ours")
+    merge_parser.add_argument("theirs")
+    merge_parser.add_argument("-o", "--output", required=True, help="where to write the merged schedule")
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        changes = schedule_diff.diff(load(args.old), load(args.new))
+        for key, (before, after) in changes['event'].items():
+            print("~ event %s: %r -> %r" % (key, before, after))
+        for kind in ["zones", "games", "streams", "days", "blocks"]:
+            moved = changes[kind].get("moved", {})
+            for key in changes[kind]['added']:
+                print("+ " + describe_key((kind[:-1], key)))
+            for key in changes[kind]['removed']:
+                print("- " + describe_key((kind[:-1], key)))
+            for key, fields in changes[kind]['changed'].items():
+                label = describe_key((kind[:-1], key))
+                if key in moved:
+                    label += " -> %s" % (time_management.minutes_to_time(moved[key][2]) or "")
+                for field, (before, after) in fields.items():
+                    print("~ %s %s: %r -> %r" % (label, field, before, after))
+        for day, link in changes['day_streams']['added']:
+            print("+ %s stream %s" % (describe_key(("day", day)), link))
+        for day, link in changes['day_streams']['removed']:
+            print("- %s stream %s" % (describe_key(("day", day)), link))
+        return 0 if schedule_diff.is_empty(changes) else 1
+
+    merged, conflicts = merge(load(args.base), load(args.ours), load(args.theirs))
+    data_management.save_data(args.output, merged)
+    for conflict in conflicts:
+        print("conflict: " + describe_conflict(conflict))
+    print("%d conflicts" % len(conflicts))
+    return 1 if conflicts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
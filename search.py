@@ -0,0 +1,77 @@
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QDockWidget, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout, QWidget
+
+import data_management
+import search_index
+
+# Global block search. Every word typed must prefix-match a block's round, its
+# game's name, its stream's platform/channel or its day; results list in
+# schedule order and activating one jumps to the block.
+
+RESULT_LIMIT = 200
+
+
+class SearchDock(QDockWidget):
+    blockActivated = pyqtSignal(object)
+
+    def __init__(self, data, parent=None):
+        super().__init__("Search", parent)
+        self.data = data
+        self.index = search_index.SearchIndex(data)
+
+        self.Query = QLineEdit()
+        self.Query.setPlaceholderText("Search blocks by game, round, stream or day")
+        self.Query.setClearButtonEnabled(True)
+        self.Query.textChanged.connect(self.refresh)
+        self.Query.returnPressed.connect(self.activateFirst)
+        self.List = QListWidget()
+        self.List.itemActivated.connect(self.activate)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.Query)
+        layout.addWidget(self.List)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        # edits often come in bursts, refresh the results once after them
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.timeout.connect(self.refresh)
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        self.index.modelChanged(data, record)
+        if self.Query.text():
+            self.refreshTimer.start(0)
+
+    def focusQuery(self):
+        self.show()
+        self.raise_()
+        self.Query.setFocus()
+        self.Query.selectAll()
+
+    def refresh(self):
+        self.List.clear()
+        block_ids = self.index.search(self.Query.text(), RESULT_LIMIT)
+        for block_id, label in zip(block_ids, self.index.describe(block_ids)):
+            item = QListWidgetItem(label)
+            item.setData(Qt.ItemDataRole.UserRole, block_id)
+            self.List.addItem(item)
+        if self.Query.text():
+            self.setWindowTitle("Search (%d%s)" % (len(block_ids), "+" if len(block_ids) == RESULT_LIMIT else ""))
+        else:
+            self.setWindowTitle("Search")
+
+    def activateFirst(self):
+        if self.List.count() > 0:
+            self.List.setCurrentRow(0)
+            self.activate(self.List.item(0))
+
+    def activate(self, item):
+        self.blockActivated.emit(item.data(Qt.ItemDataRole.UserRole))
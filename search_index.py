@@ -0,0 +1,156 @@
+import bisect
+import re
+
+import data_management
+import time_management
+import tracing
+
+# Inverted index for finding blocks by round text, game name, stream
+# platform/channel and day. Terms point at the entity they came from (a
+# block's own round, or its game, stream or day), so renaming a game re-indexes
+# one game instead of every block using it. A mutation listener keeps the
+# index current.
+
+WORD = re.compile(r"[a-z0-9]+")
+KINDS = ["block", "game", "stream", "day"]
+
+
+def tokenize(text):
+    return WORD.findall((text or "").lower())
+
+
+def entity_terms(data, kind, entity_id):
+    if kind == "block":
+        return set(tokenize(data['blocks'][entity_id]['round']))
+    if kind == "game":
+        return set(tokenize(data['games'][entity_id]['name']))
+    if kind == "stream":
+        stream = data['streams'][entity_id]
+        terms = set(tokenize(stream['platform'])) | set(tokenize(stream['stream']))
+        # "twitch/evo2" style queries
+        terms.add("".join(tokenize(stream['platform'])) + "".join(tokenize(stream['stream'])))
+        return terms
+    day = data['days'][entity_id]
+    return set(tokenize(day['day'])) | set(tokenize(day['date'])) | {"".join(tokenize(day['date']))}
+
+
+class SearchIndex:
+    def __init__(self, data):
+        self.data = data
+        self.rebuild()
+
+    def rebuild(self):
+        self.postings = {}
+        self.terms = {}
+        self.vocabulary = []
+        self.game_blocks = {}
+        for block_id, block in self.data['blocks'].items():
+            self.game_blocks.setdefault(block['game'], set()).add(block_id)
+        for kind in KINDS:
+            for entity_id in self.data[data_management.COLLECTIONS[kind]]:
+                self.index(kind, entity_id)
+
+    def index(self, kind, entity_id):
+        self.unindex(kind, entity_id)
+        terms = entity_terms(self.data, kind, entity_id)
+        self.terms[(kind, entity_id)] = terms
+        for term in terms:
+            if term not in self.postings:
+                self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+            self.postings[term].setdefault(kind, set()).add(entity_id)
+
+    def unindex(self, kind, entity_id):
+        for term in self.terms.pop((kind, entity_id), ()):
+            entities = self.postings[term][kind]
+            entities.discard(entity_id)
+            if not entities:
+                del self.postings[term][kind]
+            if not self.postings[term]:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+    def blocks_for(self, kind, entity_id):
+        if kind == "block":
+            return {entity_id}
+        if kind == "game":
+            return self.game_blocks.get(entity_id, set())
+        if kind == "stream":
+            return set(self.data['streams'][entity_id]['blocks'])
+        return set(self.data['days'][entity_id]['blocks'])
+
+    def matching(self, word):
+        # blocks with any indexed term starting with word
+        blocks = set()
+        start = bisect.bisect_left(self.vocabulary, word)
+        for term in self.vocabulary[start:]:
+            if not term.startswith(word):
+                break
+            for kind, entities in self.postings[term].items():
+                for entity_id in entities:
+                    blocks |= self.blocks_for(kind, entity_id)
+        return blocks
+
+    @tracing.traced("SearchIndex.search", "search")
+    def search(self, query, limit=200):
+        # block ids matching every word of query (as word prefixes), in day
+        # then start order
+        words = tokenize(query)
+        if not words:
+            return []
+        # longest (usually rarest) prefix first keeps the intersection small
+        results = None
+        for word in sorted(words, key=len, reverse=True):
+            blocks = self.matching(word)
+            results = blocks if results is None else results & blocks
+            if not results:
+                return []
+        day_order = {}
+        for position, (day_id, day) in enumerate(self.data['days'].items()):
+            for block_id in day['blocks']:
+                if block_id in results:
+                    day_order[block_id] = position
+        ordered = sorted(results, key=lambda block_id: (day_order.get(block_id, len(day_order)),
+                                                        self.data['blocks'][block_id]['start'] or 0))
+        return ordered[:limit]
+
+    def describe(self, block_ids):
+        # one result list label per block id
+        days = {block_id : day for day in self.data['days'].values() for block_id in day['blocks']}
+        streams = {block_id : stream for stream in self.data['streams'].values() for block_id in stream['blocks']}
+        labels = []
+        for block_id in block_ids:
+            block = self.data['blocks'][block_id]
+            game = self.data['games'].get(block['game'])
+            day = days.get(block_id, {})
+            stream = streams.get(block_id, {})
+            labels.append("%s %s  %s  %s %s  %s/%s" % (day.get('day') or "", day.get('date') or "",
+                                                      time_management.minutes_to_time(block['start']) or "",
+                                                      game['name'] if game else "?", block['round'] or "",
+                                                      stream.get('platform') or "", stream.get('stream') or ""))
+        return labels
+
+    def modelChanged(self, data, record):
+        if data is not self.data:
+            return
+        op = record['op']
+        kind = record.get('kind')
+        if op == "reset":
+            self.rebuild()
+        elif kind not in KINDS:
+            return
+        elif op == "set":
+            if kind == "block" and record['key'] == "game":
+                self.game_blocks.get(record['old'], set()).discard(record['id'])
+                self.game_blocks.setdefault(record['value'], set()).add(record['id'])
+            elif (kind, record['key']) in (("block", "round"), ("game", "name"), ("stream", "platform"),
+                                           ("stream", "stream"), ("day", "day"), ("day", "date")):
+                self.index(kind, record['id'])
+        elif op == "add":
+            if kind == "block":
+                self.game_blocks.setdefault(record['value']['game'], set()).add(record['id'])
+            self.index(kind, record['id'])
+        elif op == "remove":
+            if kind == "block":
+                self.game_blocks.get(record['value']['game'], set()).discard(record['id'])
+            self.unindex(kind, record['id'])
@@ -0,0 +1,284 @@
+import argparse
+import json
+import sqlite3
+import sys
+
+import data_management
+import time_management
+
+# Archive of many events in one SQLite file. Each event's days, streams,
+# games, blocks and zones are rows keyed by (event, id), so opening one event
+# reads only its rows, and questions across events ("every Street Fighter
+# block in 2025") are indexed SQL instead of loading every JSON file.
+# JSON import/export goes through loadJSON/parseJSON2 and save_data.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    source TEXT,
+    event TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS zones (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT,
+    identifier TEXT,
+    format TEXT,
+    PRIMARY KEY (event, id)
+);
+CREATE TABLE IF NOT EXISTS games (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    logo TEXT,
+    color TEXT,
+    PRIMARY KEY (event, id)
+);
+CREATE TABLE IF NOT EXISTS streams (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    platform TEXT,
+    stream TEXT,
+    logo TEXT,
+    PRIMARY KEY (event, id)
+);
+CREATE TABLE IF NOT EXISTS days (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    day TEXT,
+    date TEXT,
+    iso_date TEXT,
+    PRIMARY KEY (event, id)
+);
+CREATE TABLE IF NOT EXISTS day_streams (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (event, day, stream)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    event INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    day TEXT,
+    stream TEXT,
+    day_position INTEGER,
+    stream_position INTEGER,
+    game TEXT,
+    round TEXT,
+    start INTEGER,
+    "end" INTEGER,
+    PRIMARY KEY (event, id)
+);
+DROP INDEX IF EXISTS games_name;
+CREATE INDEX IF NOT EXISTS games_name_nocase ON games(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS streams_channel ON streams(platform, stream);
+CREATE INDEX IF NOT EXISTS days_iso_date ON days(iso_date);
+CREATE INDEX IF NOT EXISTS blocks_game ON blocks(event, game);
+CREATE INDEX IF NOT EXISTS blocks_day ON blocks(event, day);
+CREATE INDEX IF NOT EXISTS blocks_stream ON blocks(event, stream);
+"""
+
+TABLES = ["zones", "games", "streams", "days", "day_streams", "blocks"]
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def iso_date(date):
+    try:
+        parsed = time_management.parse_date(date)
+    except (TypeError, ValueError):
+        return None
+    return parsed.isoformat() if parsed else None
+
+
+def store_event(conn, data, event_id=None, source=None):
+    # Writes a model as one event, replacing its rows if event_id exists.
+    # Returns the event id.
+    with conn:
+        if event_id is None:
+            event_id = conn.execute("INSERT INTO events (name, source, event) VALUES (?, ?, ?)",
+                                    (data['event'].get('name'), source, json.dumps(data['event']))).lastrowid
+        else:
+            conn.execute("INSERT OR REPLACE INTO events (id, name, source, event) VALUES (?, ?, ?, ?)",
+                         (event_id, data['event'].get('name'), source, json.dumps(data['event'])))
+            for table in TABLES:
+                conn.execute("DELETE FROM %s WHERE event = ?" % table, (event_id,))
+
+        conn.executemany("INSERT INTO zones VALUES (?, ?, ?, ?, ?, ?)",
+                         [(event_id, zone_id, position, zone['text'], zone['identifier'], zone['format'])
+                          for position, (zone_id, zone) in enumerate(data['zones'].items())])
+        conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?)",
+                         [(event_id, game_id, position, game['name'], game['logo'], game['color'])
+                          for position, (game_id, game) in enumerate(data['games'].items())])
+        conn.executemany("INSERT INTO streams VALUES (?, ?, ?, ?, ?, ?)",
+                         [(event_id, stream_id, position, stream['platform'], stream['stream'], stream['logo'])
+                          for position, (stream_id, stream) in enumerate(data['streams'].items())])
+        conn.executemany("INSERT INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                         [(event_id, day_id, position, day['day'], day['date'], iso_date(day['date']))
+                          for position, (day_id, day) in enumerate(data['days'].items())])
+        conn.executemany("INSERT INTO day_streams VALUES (?, ?, ?, ?)",
+                         [(event_id, day_id, stream_id, position)
+                          for day_id, day in data['days'].items() for position, stream_id in enumerate(day['streams'])])
+
+        rows = {block_id : [event_id, block_id, None, None, None, None, block['game'], block['round'], block['start'], block['end']]
+                for block_id, block in data['blocks'].items()}
+        for day_id, day in data['days'].items():
+            for position, block_id in enumerate(day['blocks']):
+                rows[block_id][2] = day_id
+                rows[block_id][4] = position
+        for stream_id, stream in data['streams'].items():
+            for position, block_id in enumerate(stream['blocks']):
+                rows[block_id][3] = stream_id
+                rows[block_id][5] = position
+        conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows.values())
+    return event_id
+
+
+def load_event(conn, event_id):
+    # the model parseJSON2 would build, read from this event's rows only
+    row = conn.execute("SELECT event FROM events WHERE id = ?", (event_id,)).fetchone()
+    if row is None:
+        raise KeyError("no event %r" % event_id)
+    data = data_management.load_empty()
+    data['event'] = json.loads(row[0])
+
+    for zone_id, text, identifier, format in conn.execute(
+            "SELECT id, text, identifier, format FROM zones WHERE event = ? ORDER BY position", (event_id,)):
+        data['zones'][zone_id] = {"text" : text, "identifier" : identifier, "format" : format}
+    for game_id, name, logo, color in conn.execute(
+            "SELECT id, name, logo, color FROM games WHERE event = ? ORDER BY position", (event_id,)):
+        data['games'][game_id] = {"name" : name, "logo" : logo, "color" : color}
+        data['game_map'].setdefault(name, game_id)
+    for stream_id, platform, stream, logo in conn.execute(
+            "SELECT id, platform, stream, logo FROM streams WHERE event = ? ORDER BY position", (event_id,)):
+        data['streams'][stream_id] = {"platform" : platform, "stream" : stream, "logo" : logo, "blocks" : []}
+        data['stream_map'].setdefault((platform or "") + (stream or ""), stream_id)
+    for day_id, day, date in conn.execute(
+            "SELECT id, day, date FROM days WHERE event = ? ORDER BY position", (event_id,)):
+        data['days'][day_id] = {"day" : day, "date" : date, "blocks" : [], "streams" : []}
+    for day_id, stream_id in conn.execute(
+            "SELECT day, stream FROM day_streams WHERE event = ? ORDER BY day, position", (event_id,)):
+        data['days'][day_id]['streams'].append(stream_id)
+
+    rows = conn.execute('SELECT id, day, stream, day_position, stream_position, game, round, start, "end" '
+                        "FROM blocks WHERE event = ?", (event_id,)).fetchall()
+    for block_id, day_id, stream_id, day_position, stream_position, game, round, start, end in rows:
+        data['blocks'][block_id] = {"game" : game, "round" : round, "start" : start, "end" : end}
+    for row in sorted((row for row in rows if row[1] is not None), key=lambda row: row[3]):
+        data['days'][row[1]]['blocks'].append(row[0])
+    for row in sorted((row for row in rows if row[2] is not None), key=lambda row: row[4]):
+        data['streams'][row[2]]['blocks'].append(row[0])
+    return data
+
+
+def delete_event(conn, event_id):
+    with conn:
+        conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+
+def list_events(conn):
+    return conn.execute("SELECT e.id, e.name, e.source, MIN(d.iso_date), MAX(d.iso_date) "
+                        "FROM events e LEFT JOIN days d ON d.event = e.id GROUP BY e.id ORDER BY e.id").fetchall()
+
+
+def find_blocks(conn, game=None, stream=None, round=None, date_from=None, date_to=None):
+    # Blocks across every event. game/stream/round match with LIKE, so "%"
+    # wildcards work; dates are ISO (yyyy-mm-dd) and inclusive. A game
+    # without wildcards is an indexed case-insensitive equality instead.
+    where = []
+    params = []
+    if game is not None:
+        where.append("g.name LIKE ?" if "%" in game or "_" in game else "g.name = ? COLLATE NOCASE")
+        params.append(game)
+    if stream is not None:
+        where.append("(s.platform || s.stream) LIKE ?")
+        params.append(stream)
+    if round is not None:
+        where.append("b.round LIKE ?")
+        params.append(round)
+    if date_from is not None:
+        where.append("d.iso_date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("d.iso_date <= ?")
+        params.append(date_to)
+    query = ('SELECT e.id, e.name, d.date, s.platform, s.stream, g.name, b.round, b.start, b."end" '
+             "FROM blocks b "
+             "JOIN events e ON e.id = b.event "
+             "LEFT JOIN days d ON d.event = b.event AND d.id = b.day "
+             "LEFT JOIN streams s ON s.event = b.event AND s.id = b.stream "
+             "LEFT JOIN games g ON g.event = b.event AND g.id = b.game")
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY d.iso_date, b.start"
+    return conn.execute(query, params).fetchall()
+
+
+def import_json(conn, path, event_id=None):
+    data = data_management.parseJSON2(data_management.loadJSON(path))
+    return store_event(conn, data, event_id, source=path)
+
+
+def export_json(conn, event_id, path):
+    data_management.save_data(path, load_event(conn, event_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep many schedules in one SQLite archive.")
+    parser.add_argument("database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="add schedule files as events")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--replace", type=int, help="overwrite this event id instead of adding (one file only)")
+    export_parser = commands.add_parser("export", help="write an event back out as a schedule file")
+    export_parser.add_argument("event", type=int)
+    export_parser.add_argument("output")
+    commands.add_parser("list", help="list stored events")
+    find_parser = commands.add_parser("find", help="search blocks across all events")
+    find_parser.add_argument("--game")
+    find_parser.add_argument("--stream")
+    find_parser.add_argument("--round")
+    find_parser.add_argument("--from", dest="date_from", help="first date, yyyy-mm-dd")
+    find_parser.add_argument("--to", dest="date_to", help="last date, yyyy-mm-dd")
+    find_parser.add_argument("--year", type=int)
+    args = parser.parse_args(argv)
+
+    conn = connect(args.database)
+    if args.command == "import":
+        if args.replace is not None and len(args.files) != 1:
+            parser.error("--replace takes exactly one file")
+        for path in args.files:
+            print("%d %s" % (import_json(conn, path, args.replace), path))
+    elif args.command == "export":
+        export_json(conn, args.event, args.output)
+    elif args.command == "list":
+        for event_id, name, source, first, last in list_events(conn):
+            print("%d\t%s\t%s..%s\t%s" % (event_id, name, first, last, source))
+    elif args.command == "find":
+        date_from = args.date_from
+        date_to = args.date_to
+        if args.year is not None:
+            date_from = date_from or "%04d-01-01" % args.year
+            date_to = date_to or "%04d-12-31" % args.year
+        for event_id, event, date, platform, stream, game, round, start, end in find_blocks(
+                conn, args.game, args.stream, args.round, date_from, date_to):
+            print("%s\t%s\t%s%s\t%s\t%s\t%s-%s" % (event, date, platform, stream, game, round,
+                                                 time_management.minutes_to_time(start), time_management.minutes_to_time(end)))
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import array
+import bisect
+import datetime
+import functools
+import zoneinfo
+
+
+def time_to_minutes(time):
+    # "hh:mm:ss" (or "hh:mm") -> minutes since midnight in the event time zone
+    if time is None or time == "":
+        return None
+    if isinstance(time, int):
+        return time
+    parts = time.split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def minutes_to_time(minutes):
+    if minutes is None:
+        return None
+    minutes = minutes % 1440
+    return "%02d:%02d:00" % (minutes // 60, minutes % 60)
+
+
+def block_length(start, end):
+    # minutes from start to end; an end before the start is past midnight
+    return end - start if end >= start else end + 1440 - start
+
+
+def parse_date(date):
+    # dates are stored as "MM-dd-yyyy", see DateRow
+    if not date:
+        return None
+    return datetime.date(int(date[-4:]), int(date[:2]), int(date[3:5]))
+
+
+@functools.lru_cache(maxsize=None)
+def format_minutes(minutes, format):
+    minutes = minutes % 1440
+    hour = minutes // 60
+    minute = minutes % 60
+    if format == "12h":
+        suffix = "AM" if hour < 12 else "PM"
+        hour = hour % 12
+        if hour == 0:
+            hour = 12
+        return "%d:%02d %s" % (hour, minute, suffix)
+    return "%02d:%02d" % (hour, minute)
+
+
+@functools.lru_cache(maxsize=None)
+def available_zones():
+    # scanning the tz database is slow, and EventTab is rebuilt on every visit
+    return sorted(zoneinfo.available_timezones())
+
+
+@functools.lru_cache(maxsize=None)
+def get_zone(identifier):
+    try:
+        return zoneinfo.ZoneInfo(identifier)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError, TypeError):
+        return None
+
+
+class ZoneTable:
+    # Offsets from the event zone to one display zone across a single event day.
+    # The day is split at DST transition points, so converting a time is a
+    # bisect into starts plus an add from offsets.
+    STEP = 15
+    SPAN = 2880
+
+    def __init__(self, event_zone, identifier, date):
+        self.event_zone = event_zone
+        self.identifier = identifier
+        self.date = date
+        self.starts = array.array('i', [0])
+        self.offsets = array.array('i', [0])
+
+        source = get_zone(event_zone)
+        target = get_zone(identifier)
+        day = parse_date(date)
+        if source is None or target is None or day is None:
+            return
+        self.midnight = datetime.datetime(day.year, day.month, day.day, tzinfo=source)
+        self.target = target
+
+        self.offsets[0] = self.offset(0)
+        previous = 0
+        for minute in range(self.STEP, self.SPAN, self.STEP):
+            offset = self.offset(minute)
+            if offset != self.offsets[-1]:
+                self.starts.append(self.transition(previous, minute))
+                self.offsets.append(offset)
+            previous = minute
+
+    def offset(self, minute):
+        local = self.midnight + datetime.timedelta(minutes=minute)
+        delta = local.astimezone(self.target).utcoffset() - local.utcoffset()
+        return int(delta.total_seconds() // 60)
+
+    def transition(self, low, high):
+        # first minute in (low, high] that has the offset found at high
+        target = self.offset(high)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.offset(middle) == target:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def convert(self, minutes):
+        return minutes + self.offsets[bisect.bisect_right(self.starts, minutes) - 1]
+
+
+class ZoneTables:
+    # ZoneTable per (event zone, zone identifier, day date), built on first use.
+    # Dropped only when a zone identifier, a day date or the event zone changes.
+    def __init__(self):
+        self.tables = {}
+
+    def get(self, event_zone, identifier, date):
+        key = (event_zone, identifier, date)
+        table = self.tables.get(key)
+        if table is None:
+            table = ZoneTable(event_zone, identifier, date)
+            self.tables[key] = table
+        return table
+
+    def invalidate_zone(self, identifier):
+        for key in [key for key in self.tables if key[1] == identifier]:
+            self.tables.pop(key)
+
+    def invalidate_day(self, date):
+        for key in [key for key in self.tables if key[2] == date]:
+            self.tables.pop(key)
+
+    def clear(self):
+        self.tables.clear()
+
+
+zone_tables = ZoneTables()
+
+
+def format_time(data, minutes, zone_id=None, date=None):
+    if minutes is None:
+        return ""
+    event = data['event']
+    if zone_id is None:
+        return format_minutes(minutes, event['time format'] or "24h")
+    zone = data['zones'][zone_id]
+    table = zone_tables.get(event['time zone'], zone['identifier'], date)
+    return format_minutes(table.convert(minutes), zone['format'] or event['time format'] or "24h")
+
+
+def format_block(data, block_id, zone_id=None, date=None):
+    block = data['blocks'][block_id]
+    return (format_time(data, block['start'], zone_id, date), format_time(data, block['end'], zone_id, date))
@@ -0,0 +1,252 @@
+import contextlib
+
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QPen
+from PyQt6.QtWidgets import (QComboBox, QGraphicsItem, QGraphicsRectItem, QGraphicsScene, QGraphicsSimpleTextItem,
+                             QGraphicsView, QHBoxLayout, QLabel, QStyleOptionGraphicsItem, QVBoxLayout, QWidget)
+
+import data_management
+import logos
+import renderer
+import time_management
+
+# Gantt view of one day: a lane per stream, a movable/resizable item per
+# block. Items cache their painting in device coordinates and drop logos and
+# text as the view zooms out, so large days stay smooth to pan.
+
+MINUTE_WIDTH = 2
+LANE_HEIGHT = 70
+LANE_GAP = 6
+HEADER_WIDTH = 160
+RULER_HEIGHT = 30
+SNAP = 5
+EDGE = 6
+TEXT_DETAIL = 0.45
+LOGO_DETAIL = 0.8
+
+def snap(minutes):
+    return int(round(minutes / SNAP)) * SNAP
+
+
+class BlockItem(QGraphicsRectItem):
+    def __init__(self, timeline, block_id, lane):
+        super().__init__()
+        self.timeline = timeline
+        self.id = block_id
+        self.lane = lane
+        self.mode = None
+        self.setFlags(QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
+                      QGraphicsItem.GraphicsItemFlag.ItemIsSelectable |
+                      QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.setAcceptHoverEvents(True)
+        self.refresh()
+
+    def refresh(self):
+        data = self.timeline.data
+        block = data['blocks'][self.id]
+        game = data['games'].get(block['game'], {"name" : "", "logo" : None, "color" : "#808080"})
+        start = block['start'] or 0
+        end = start + time_management.block_length(start, block['end']) if block['end'] is not None else start + 60
+        self.start = start
+        self.end = end
+        self.game = game['name'] or ""
+        self.logo = game['logo']
+        self.round = block['round'] or ""
+        self.color = QColor(game['color'] or "#808080")
+        self.textColor = renderer.text_color(game['color'])
+        self.times = "%s - %s" % time_management.format_block(data, self.id)
+        self.prepareGeometryChange()
+        self.setRect(0, 0, max(SNAP, end - start) * MINUTE_WIDTH, LANE_HEIGHT)
+        self.setPos(HEADER_WIDTH + start * MINUTE_WIDTH, RULER_HEIGHT + self.lane * (LANE_HEIGHT + LANE_GAP))
+        self.setToolTip("%s\n%s\n%s" % (self.game, self.round, self.times))
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        rect = self.rect()
+        detail = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        painter.setPen(QPen(Qt.GlobalColor.white, 2) if self.isSelected() else Qt.PenStyle.NoPen)
+        painter.setBrush(self.color)
+        if detail < TEXT_DETAIL:
+            painter.drawRect(rect)
+            return
+        painter.drawRoundedRect(rect, 4, 4)
+        left = 4
+        if detail >= LOGO_DETAIL and rect.width() > LANE_HEIGHT * 2:
+            logo = logos.registry.image(self.logo, LANE_HEIGHT - 8)
+            if not logo.isNull():
+                painter.drawImage(4, 4, logo)
+                left += logo.width() + 4
+        painter.setPen(self.textColor)
+        painter.setFont(self.timeline.font)
+        text = QRectF(left, 2, rect.width() - left - 2, rect.height() - 4)
+        painter.drawText(text, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, "%s\n%s\n%s" % (self.game, self.round, self.times))
+
+    def hoverMoveEvent(self, event):
+        x = event.pos().x()
+        if x < EDGE or x > self.rect().width() - EDGE:
+            self.setCursor(Qt.CursorShape.SizeHorCursor)
+        else:
+            self.setCursor(Qt.CursorShape.OpenHandCursor)
+
+    def mousePressEvent(self, event):
+        x = event.pos().x()
+        if x < EDGE:
+            self.mode = "start"
+        elif x > self.rect().width() - EDGE:
+            self.mode = "end"
+        else:
+            self.mode = "move"
+        self.pressX = event.scenePos().x()
+        self.pressStart = self.start
+        self.pressEnd = self.end
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        delta = (event.scenePos().x() - self.pressX) / MINUTE_WIDTH
+        # clamp the start before deriving the end, so a move keeps its length
+        if self.mode == "move":
+            self.start = max(0, snap(self.pressStart + delta))
+            self.end = self.start + (self.pressEnd - self.pressStart)
+        elif self.mode == "start":
+            self.start = max(0, min(snap(self.pressStart + delta), self.end - SNAP))
+        elif self.mode == "end":
+            self.end = max(snap(self.pressEnd + delta), self.start + SNAP)
+        self.prepareGeometryChange()
+        self.setRect(0, 0, (self.end - self.start) * MINUTE_WIDTH, LANE_HEIGHT)
+        self.setPos(HEADER_WIDTH + self.start * MINUTE_WIDTH, self.pos().y())
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        self.mode = None
+        start = self.start % 1440
+        end = self.end % 1440
+        data = self.timeline.data
+        self.timeline.applying = True
+        try:
+            # one drag is one undo step
+            with self.timeline.group():
+                data_management.update_block(data, self.id, 'start', start)
+                data_management.update_block(data, self.id, 'end', end)
+        finally:
+            self.timeline.applying = False
+        self.refresh()
+
+
+class TimelineView(QGraphicsView):
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setOptimizationFlags(QGraphicsView.OptimizationFlag.DontSavePainterState |
+                                  QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.setBackgroundBrush(QBrush(QColor(renderer.BACKGROUND)))
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            factor = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
+            self.scale(factor, factor)
+        else:
+            super().wheelEvent(event)
+
+
+class TimelineTab(QWidget):
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+        self.dayID = None
+        self.items = {}
+        self.applying = False
+        self.font = QFont()
+        self.font.setPixelSize(11)
+
+        self.DaySelect = QComboBox()
+        self.DaySelect.activated.connect(self.selectDayIndex)
+        self.scene = QGraphicsScene(self)
+        self.view = TimelineView(self.scene)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Day"))
+        controls.addWidget(self.DaySelect)
+        controls.addWidget(QLabel("Ctrl+wheel to zoom, drag blocks or their edges to retime"))
+        controls.addStretch()
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+        self.setMinimumSize(1200, 800)
+
+        self.fillDays()
+        data_management.add_listener(self.modelChanged)
+
+    def shutdown(self):
+        data_management.remove_listener(self.modelChanged)
+
+    def group(self):
+        # the editor window's undo grouping, when the tab is inside one
+        history = getattr(self.window(), "History", None)
+        return history.group() if history is not None else contextlib.nullcontext()
+
+    def fillDays(self):
+        self.DaySelect.clear()
+        for day_id, day in self.data['days'].items():
+            self.DaySelect.addItem("%s %s" % (day['day'] or "", day['date'] or ""), day_id)
+        if self.dayID not in self.data['days']:
+            self.dayID = next(iter(self.data['days']), None)
+        self.DaySelect.setCurrentIndex(max(0, self.DaySelect.findData(self.dayID)))
+        self.buildScene()
+
+    def selectDayIndex(self, index):
+        self.dayID = self.DaySelect.itemData(index)
+        self.buildScene()
+
+    def buildScene(self):
+        self.scene.clear()
+        self.items = {}
+        if self.dayID is None:
+            return
+        day = self.data['days'][self.dayID]
+        day_blocks = set(day['blocks'])
+        grid = QPen(QColor(255, 255, 255, 40))
+        lanes = len(day['streams'])
+        height = RULER_HEIGHT + lanes * (LANE_HEIGHT + LANE_GAP)
+        for hour in range(0, 49):
+            x = HEADER_WIDTH + hour * 60 * MINUTE_WIDTH
+            self.scene.addLine(x, RULER_HEIGHT, x, height, grid)
+            label = QGraphicsSimpleTextItem(time_management.format_time(self.data, hour * 60))
+            label.setBrush(QColor(renderer.FOREGROUND))
+            label.setPos(x + 2, 6)
+            self.scene.addItem(label)
+        for lane, stream_id in enumerate(day['streams']):
+            stream = self.data['streams'][stream_id]
+            y = RULER_HEIGHT + lane * (LANE_HEIGHT + LANE_GAP)
+            header = QGraphicsSimpleTextItem("%s/%s" % (stream['platform'], stream['stream']))
+            header.setBrush(QColor(renderer.FOREGROUND))
+            header.setPos(6, y + LANE_HEIGHT / 2 - 8)
+            self.scene.addItem(header)
+            for block_id in stream['blocks']:
+                if block_id in day_blocks:
+                    item = BlockItem(self, block_id, lane)
+                    self.scene.addItem(item)
+                    self.items[block_id] = item
+        self.scene.setSceneRect(0, 0, HEADER_WIDTH + 48 * 60 * MINUTE_WIDTH, height)
+
+    def modelChanged(self, data, record):
+        if data is not self.data or self.applying:
+            return
+        op = record['op']
+        kind = record.get('kind')
+        if op == "reset" or kind == "day":
+            self.fillDays()
+        elif op == "set" and kind == "block":
+            item = self.items.get(record['id'])
+            if item is not None:
+                item.refresh()
+        elif op == "set" and kind == "game":
+            for item in self.items.values():
+                if self.data['blocks'][item.id]['game'] == record['id']:
+                    item.refresh()
+        elif kind in ("block", "stream") or op in ("add_day_stream", "remove_day_stream") or (kind == "event" and record['key'] == "time format"):
+            self.buildScene()
@@ -0,0 +1,90 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# Opt-in span recording for hot paths. Spans go into a ring buffer and are
+# exported in the Chrome/Perfetto trace event format. Set SCHEDULE_TRACE=1
+# to record from startup, or call enable().
+
+enabled = os.environ.get("SCHEDULE_TRACE", "") not in ("", "0")
+events = collections.deque(maxlen=int(os.environ.get("SCHEDULE_TRACE_SIZE", "200000")))
+thread_names = {}
+
+
+def enable(capacity=None):
+    global enabled, events
+    if capacity is not None and capacity != events.maxlen:
+        events = collections.deque(events, maxlen=capacity)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def clear():
+    events.clear()
+
+
+def now():
+    return time.perf_counter_ns() // 1000
+
+
+def record(name, start, duration, category="app", args=None):
+    thread = threading.current_thread()
+    thread_names[thread.ident] = thread.name
+    event = {"name" : name, "cat" : category, "ph" : "X", "ts" : start, "dur" : duration, "tid" : thread.ident}
+    if args:
+        event['args'] = args
+    events.append(event)
+
+
+class span:
+    def __init__(self, name, category="app", **args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        if enabled:
+            self.start = now()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, self.start, now() - self.start, self.category, self.args)
+        return False
+
+
+def traced(name=None, category="app"):
+    def decorator(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = now()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(label, start, now() - start, category)
+        return wrapper
+    return decorator
+
+
+def export(fileName):
+    pid = os.getpid()
+    trace = []
+    for ident, name in thread_names.items():
+        trace.append({"name" : "thread_name", "ph" : "M", "pid" : pid, "tid" : ident, "args" : {"name" : name}})
+    for event in list(events):
+        trace.append(dict(event, pid=pid))
+    with open(fileName, 'w', encoding="utf-8") as outfile:
+        json.dump({"traceEvents" : trace, "displayTimeUnit" : "ms"}, outfile)
+    return len(trace)
@@ -0,0 +1,194 @@
+import os
+
+import data_management
+import pack
+import time_management
+
+# Rule-based schedule validation that keeps up with edits. The validator owns
+# a private mirror of the model, updated by replaying mutation records, so it
+# can run on a worker thread without reading the editor's live dicts. After a
+# full pass on load, each record re-checks only the entities it touched.
+#
+# Issues are keyed by entity, (kind, id), where kind is a model kind or
+# "game_map"/"stream_map" with the map key as id.
+
+
+def logo_exists(path):
+    # pack: paths exist while a mounted pack holds them
+    if pack.is_pack_path(path):
+        return pack.find(path[len(pack.PREFIX):]) is not None
+    return bool(path) and os.path.exists(path)
+
+
+def check_block(data, block_id):
+    block = data['blocks'][block_id]
+    issues = []
+    if block['game'] not in data['games']:
+        issues.append("references missing game %s" % block['game'])
+    if block['start'] is None or block['end'] is None:
+        issues.append("is missing a start or end time")
+    elif time_management.block_length(block['start'], block['end']) == 0:
+        issues.append("has zero length")
+    elif time_management.block_length(block['start'], block['end']) > 1440:
+        issues.append("is longer than 24 hours")
+    return issues
+
+
+def check_game(data, game_id):
+    game = data['games'][game_id]
+    issues = []
+    if not game['name']:
+        issues.append("has no name")
+    if not game['logo']:
+        issues.append("has no logo")
+    elif not logo_exists(game['logo']):
+        issues.append("logo %s does not exist" % game['logo'])
+    return issues
+
+
+def check_stream(data, stream_id):
+    stream = data['streams'][stream_id]
+    issues = []
+    if not stream['platform'] and not stream['stream']:
+        issues.append("has no platform or channel")
+    if stream['logo'] and not logo_exists(stream['logo']):
+        issues.append("logo %s does not exist" % stream['logo'])
+    return issues
+
+
+def check_day(data, day_id):
+    day = data['days'][day_id]
+    issues = []
+    if not day['date']:
+        issues.append("has no date")
+    for stream_id in day['streams']:
+        if stream_id not in data['streams']:
+            issues.append("references missing stream %s" % stream_id)
+    return issues
+
+
+def check_zone(data, zone_id):
+    zone = data['zones'][zone_id]
+    if time_management.get_zone(zone['identifier']) is None:
+        return ["has an unknown time zone %s" % zone['identifier']]
+    return []
+
+
+def check_game_map(data, name):
+    game = data['games'].get(data['game_map'][name])
+    if game is None or game['name'] != name:
+        return ["is out of sync with games"]
+    return []
+
+
+def check_stream_map(data, link):
+    stream = data['streams'].get(data['stream_map'][link])
+    if stream is None or (stream['platform'] or "") + (stream['stream'] or "") != link:
+        return ["is out of sync with streams"]
+    return []
+
+
+RULES = {
+    "block" : (check_block, "blocks"),
+    "game" : (check_game, "games"),
+    "stream" : (check_stream, "streams"),
+    "day" : (check_day, "days"),
+    "zone" : (check_zone, "zones"),
+    "game_map" : (check_game_map, "game_map"),
+    "stream_map" : (check_stream_map, "stream_map"),
+}
+
+
+def describe(data, kind, entity_id):
+    # short label for an entity of the mirror, for the issues list
+    if kind == "block":
+        block = data['blocks'].get(entity_id)
+        if block is not None:
+            game = data['games'].get(block['game'])
+            return "Block %s %s %s" % (game['name'] if game else "?", block['round'] or "",
+                                       time_management.minutes_to_time(block['start']) or "")
+    elif kind == "game" and entity_id in data['games']:
+        return "Game %s" % data['games'][entity_id]['name']
+    elif kind == "stream" and entity_id in data['streams']:
+        stream = data['streams'][entity_id]
+        return "Stream %s/%s" % (stream['platform'], stream['stream'])
+    elif kind == "day" and entity_id in data['days']:
+        day = data['days'][entity_id]
+        return "Day %s %s" % (day['day'] or "", day['date'] or "")
+    elif kind == "zone" and entity_id in data['zones']:
+        zone = data['zones'][entity_id]
+        return "Zone %s" % (zone['text'] or zone['identifier'])
+    return "%s %s" % (kind.replace("_", " ").capitalize(), entity_id)
+
+
+def touched(data, record):
+    # entities of data (already updated by record) whose rules may have
+    # changed outcome
+    op = record['op']
+    kind = record.get('kind')
+    if op in ("add_day_stream", "remove_day_stream"):
+        return [("day", record['day'])]
+    if kind == "event":
+        return []
+    entities = [(kind, record['id'])]
+    if op == "set":
+        if kind == "game" and record['key'] == "name":
+            entities += [("game_map", record['old']), ("game_map", record['value'])]
+        elif kind == "stream" and record['key'] in ("platform", "stream"):
+            stream = data['streams'][record['id']]
+            old = dict(stream, **{record['key'] : record['old']})
+            entities += [("stream_map", (old['platform'] or "") + (old['stream'] or "")),
+                         ("stream_map", (stream['platform'] or "") + (stream['stream'] or ""))]
+        return entities
+    value = record['value']
+    if kind == "game":
+        entities.append(("game_map", value['name']))
+        if op == "add":
+            # blocks that pointed at this id before it existed
+            entities += [("block", block_id) for block_id, block in data['blocks'].items() if block['game'] == record['id']]
+    elif kind == "stream":
+        entities.append(("stream_map", (value['platform'] or "") + (value['stream'] or "")))
+        entities += [("day", day_id) for day_id, index in record.get('days', [])]
+    return entities
+
+
+class Validator:
+    # takes ownership of data, so pass a copy of the editor's model
+    def __init__(self, data):
+        self.data = data
+        self.issues = {}
+
+    def check(self, kind, entity_id):
+        rule, collection = RULES[kind]
+        if entity_id not in self.data[collection]:
+            return []
+        return ["%s %s" % (describe(self.data, kind, entity_id), issue) for issue in rule(self.data, entity_id)]
+
+    def full(self):
+        # {(kind, id): [issue, ...]} for every entity with issues
+        self.issues = {}
+        for kind, (rule, collection) in RULES.items():
+            for entity_id in list(self.data[collection]):
+                issues = self.check(kind, entity_id)
+                if issues:
+                    self.issues[(kind, entity_id)] = issues
+        return dict(self.issues)
+
+    def update(self, record):
+        # Applies record to the mirror and re-checks what it touched. Returns
+        # {(kind, id): [issue, ...]} for those entities; empty lists mean the
+        # entity no longer has issues.
+        handler = data_management.handlers.get(record['op'])
+        if handler is None:
+            return {}
+        handler(self.data, record)
+        changes = {}
+        for entity in touched(self.data, record):
+            issues = self.check(*entity)
+            if issues != self.issues.get(entity, []):
+                changes[entity] = issues
+                if issues:
+                    self.issues[entity] = issues
+                else:
+                    self.issues.pop(entity, None)
+        return changes
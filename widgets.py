@@ -1,12 +1,21 @@
-import typing
-from PyQt6 import QtCore
-from PyQt6.QtWidgets import QFileDialog, QTabWidget, QCheckBox, QTimeEdit, QDateEdit, QSizePolicy, QScrollArea, QApplication, QColorDialog, QPushButton, QLabel, QMainWindow, QMenu, QLineEdit, QWidget, QFrame, QHBoxLayout, QVBoxLayout, QFormLayout, QComboBox, QCompleter, QDialog
-from PyQt6.QtCore import Qt, QSize, QTime, QDate, pyqtSignal
-from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QAction
-import zoneinfo
-import shortuuid
-import sys
+from PyQt6.QtWidgets import QApplication, QFileDialog, QTabWidget, QCheckBox, QTimeEdit, QDateEdit, QSizePolicy, QScrollArea, QColorDialog, QPushButton, QLabel, QMainWindow, QLineEdit, QWidget, QFrame, QHBoxLayout, QVBoxLayout, QFormLayout, QComboBox, QCompleter, QDialog, QMessageBox
+from PyQt6.QtCore import Qt, QTime, QDate, QObject, QStringListModel, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap, QColor, QAction, QKeySequence
+import copy
+import os
 import data_management
+import fuzzy
+import history
+import journal
+import logos
+import pack
+import time_management
+import tracing
+
+@tracing.traced("loadLogo", "logo")
+def loadLogo(path, size=200):
+    return logos.registry.pixmap(path, size)
+
 
 class TextRow(QWidget):
     changedText = pyqtSignal(str)
@@ -41,12 +50,12 @@ class TextRow(QWidget):
         self.changedText.emit(self.line.text())
 
 class TimeRow(QWidget):
-    changedTime = pyqtSignal(str)
+    changedTime = pyqtSignal(int)
     def __init__(self, label):
         super().__init__()
         self.Label = QLabel(label)
         self.TimePick = QTimeEdit()
-        self.TimePick.setDisplayFormat("hh:mm:ss")
+        self.TimePick.setDisplayFormat("hh:mm")
         self.layout = QHBoxLayout()
         self.layout.addWidget(self.Label)
         self.layout.addWidget(self.TimePick)
@@ -54,17 +63,15 @@ class TimeRow(QWidget):
 
         self.TimePick.timeChanged.connect(self.changeTime)
 
-    def setTime(self, time):
-        qtime = QTime()
-        qtime = qtime.fromString(time, "hh:mm:ss")
-        self.TimePick.setTime(qtime)
+    def setTime(self, minutes):
+        self.TimePick.setTime(QTime(minutes // 60 % 24, minutes % 60))
 
     def value(self):
-        return self.TimePick.time().toString("hh:mm:ss")
+        qtime = self.TimePick.time()
+        return qtime.hour() * 60 + qtime.minute()
     
     def changeTime(self, qtime:QTime):
-        time = qtime.toString("hh:mm:ss")
-        self.changedTime.emit(qtime.toString("hh:mm:ss"))
+        self.changedTime.emit(qtime.hour() * 60 + qtime.minute())
 
 
     
@@ -102,28 +109,47 @@ class DateRow(QWidget):
 
 class SearchableDropdown(QWidget):
     changedText = pyqtSignal(str)
-    def __init__(self, name, key, items):
+    def __init__(self, name, key, items, index=None):
         super().__init__()
         self.name = name
         self.key = key
+        # a shared catalog index when given, else a private one over items,
+        # built on the first keystroke
+        self.items = items
+        self.index = index
         container = QWidget()
         layout = QHBoxLayout()
         self.label = QLabel(name)
-        self.completer = QCompleter(items)
-        self.completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.matches = QStringListModel()
+        self.completer = QCompleter(self.matches)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
         self.c_box = QComboBox()
         self.c_box.setEditable(True)
         self.c_box.addItems(items)
         self.c_box.setCompleter(self.completer)
+        self.c_box.lineEdit().textEdited.connect(self.search)
+        self.completer.activated[str].connect(self.pick)
         layout.addWidget(self.label)
         layout.addWidget(self.c_box)
         self.setLayout(layout)
         self.setMaximumSize(1000,1000)
         self.c_box.currentTextChanged.connect(self.changeText)
 
+    def search(self, text):
+        # ranked fuzzy matches replace the completer's list on each keystroke
+        if self.index is None:
+            self.index = fuzzy.TrigramIndex(self.items)
+        self.matches.setStringList(self.index.search(text) if text else [])
+        if self.matches.rowCount() > 0:
+            self.completer.complete()
+
+    def pick(self, text):
+        # a shared catalog can hold items added after the combo box was filled
+        if self.c_box.findText(text) == -1:
+            self.c_box.addItem(text)
+        self.c_box.setCurrentIndex(self.c_box.findText(text))
+
     def setValue(self, value):
-        print(value)
         index = self.c_box.findText(value)
         self.c_box.setCurrentIndex(index)
 
@@ -144,7 +170,7 @@ class TimeZone(QFrame):
         self.id = zone_id
         self.data = data
         self.ZoneName = TextRow("Zone Common Name", "")
-        self.ZoneSelect = SearchableDropdown("Time Zone", "", zone_list)
+        self.ZoneSelect = SearchableDropdown("Time Zone", "", zone_list, fuzzy.catalogs.get("zones"))
         self.FormatSelect = SearchableDropdown("Zone Format", "", ['12h', '24h'])
 
         layout = QVBoxLayout()
@@ -176,29 +202,31 @@ class TimeZone(QFrame):
         self.setFrameStyle(QFrame.Shape.Panel)
 
     def removeZone(self):
-        self.data['zones'].pop(self.id)
+        data_management.remove_zone(self.data, self.id)
         self.setVisible(False)
     
     def updateZoneName(self, name):
-        self.data['zones'][self.id]['text'] = name
+        data_management.update_zone(self.data, self.id, 'text', name)
     
     def updateZoneID(self, identifier):
-        self.data['zones'][self.id]['identifier'] = identifier
+        time_management.zone_tables.invalidate_zone(self.data['zones'][self.id]['identifier'])
+        data_management.update_zone(self.data, self.id, 'identifier', identifier)
 
     def updateZoneFormat(self, format):
-        self.data['zones'][self.id]['format'] = format
+        data_management.update_zone(self.data, self.id, 'format', format)
 
 class EventTab(QWidget):
+    @tracing.traced("EventTab")
     def __init__(self, data):
         super().__init__()
         self.data = data
-        self.tzs = zoneinfo.available_timezones()
+        self.tzs = time_management.available_zones()
         self.EventName =TextRow("Event Name", "event_name")
         self.EventDate = TextRow("Event Date", "event_date")
         self.EventLoc = TextRow("Event Location", "event_loc")
         self.EventTwitter = TextRow("Event Twitter", "event_twitter")
         self.EventHashtag = TextRow("Event Hashtag", "event_hashtag")
-        self.EventTimezone = SearchableDropdown("Event Timezone", "event_timezone", self.tzs)
+        self.EventTimezone = SearchableDropdown("Event Timezone", "event_timezone", self.tzs, fuzzy.catalogs.get("zones"))
         self.EventTZText = TextRow("Event Timezone Text", "event_tz_text")
         self.EventTimeFormat = SearchableDropdown("Event Time Format", "event_time_format", ['12h', '24h'])
         self.EventTitleTop = TextRow("Event Top Title Line", "event_title1")
@@ -266,52 +294,47 @@ class EventTab(QWidget):
         self.setLayout(self.layout)
 
     def addZone(self):
-        new_id = shortuuid.uuid()
-        zone_obj = {
-            "text" : None,
-            "identifier" : None,
-            "format" : None
-        }
-        self.data['zones'][new_id] = zone_obj
+        new_id = data_management.add_zone(self.data)
 
         newWidget = TimeZone(self.tzs, new_id, self.data)
         self.layout.addWidget(newWidget)
 
     def updateEventName(self, name):
-        self.data['event']['name'] = name
+        data_management.update_event(self.data, 'name', name)
     
     def updateEventDate(self, dates):
-        self.data['event']['dates'] = dates
+        data_management.update_event(self.data, 'dates', dates)
 
     def updateEventLoc(self, loc):
-        self.data['event']['location'] = loc
+        data_management.update_event(self.data, 'location', loc)
 
     def updateEventTwitter(self, twit):
-        self.data['event']['twitter'] = twit
+        data_management.update_event(self.data, 'twitter', twit)
     
     def updateEventHashtag(self, tag):
-        self.data['event']['hashtag'] = tag
+        data_management.update_event(self.data, 'hashtag', tag)
     
     def updateEventTimezone(self, tz):
-        self.data['event']['time zone'] = tz
+        time_management.zone_tables.clear()
+        data_management.update_event(self.data, 'time zone', tz)
 
     def updateEventTZText(self, text):
-        self.data['event']['zone_text'] = text
+        data_management.update_event(self.data, 'zone_text', text)
 
     def updateEventTimeFormat(self, format):
-        self.data['event']['time format'] = format
+        data_management.update_event(self.data, 'time format', format)
 
     def updateEventTopTitle(self, title):
-        self.data['event']['title_line1'] = title
+        data_management.update_event(self.data, 'title_line1', title)
 
     def updateEventBottomTitle(self, title):
-        self.data['event']['title_line2'] = title
+        data_management.update_event(self.data, 'title_line2', title)
 
     def updateEventAuthor(self, author):
-        self.data['event']['scheduler'] = author
+        data_management.update_event(self.data, 'scheduler', author)
     
     def updateEventSchedule(self, sched):
-        self.data['event']['official_schedule'] = sched
+        data_management.update_event(self.data, 'official_schedule', sched)
 
 class GameInfo(QWidget):
     logoUpdated = pyqtSignal(str)
@@ -343,24 +366,15 @@ class GameInfo(QWidget):
         self.RemoveButton.clicked.connect(self.removeGame)
 
     def updateGameName(self, name):
-        old_name = self.data['games'][self.game_id]['name']
-        self.data['game_map'].pop(old_name)
-        self.data['game_map'][name] = self.game_id
-        self.data['games'][self.game_id]['name'] = name
+        data_management.update_game(self.data, self.game_id, 'name', name)
 
     def updateGameLogo(self, path):
-        self.data['games'][self.game_id]['logo'] = path
+        data_management.update_game(self.data, self.game_id, 'logo', path)
         self.logoUpdated.emit(path)
         
     def removeGame(self):
-        for block in self.data['blocks']:
-            if self.data['blocks'][block]['game'] == self.game_id:
-                return
-            
-        name = self.data['games'][self.game_id]['name']
-        self.data['game_map'].pop(name)
-
-        self.data['games'].pop(self.game_id)
+        if not data_management.remove_game(self.data, self.game_id):
+            return
 
         self.parent().setVisible(False)
 
@@ -394,7 +408,7 @@ class GameColor(QWidget):
         self.ColorBox.setPixmap(box)
         self.ColorName.setText(color.name())
 
-        self.data['games'][self.game_id]['color'] = color.name()
+        data_management.update_game(self.data, self.game_id, 'color', color.name())
 
 
 class AddColor(QWidget):
@@ -452,11 +466,10 @@ class GameBox(QFrame):
         self.game_id = game_id
         self.Logo = None
         if game_id is not None:
-            self.Logo = QImage(data['games'][game_id]['logo'])
-        else: self.Logo = QImage("E:\\Acekingoffsuit clone\\Game Logos\\SSBUltimate.png")
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+            self.Logo = loadLogo(data['games'][game_id]['logo'])
+        else: self.Logo = loadLogo("E:\\Acekingoffsuit clone\\Game Logos\\SSBUltimate.png")
         self.LogoWidget = QLabel()
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.LogoWidget.setPixmap(self.Logo)
         self.GameInfo = GameInfo(data, game_id)
         
         #self.GameColors = GameColors(game_data['colors'])
@@ -474,9 +487,8 @@ class GameBox(QFrame):
         self.setMaximumSize(1500, 300)
 
     def updateLogo(self, path):
-        self.Logo = QImage(path)
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.Logo = loadLogo(path)
+        self.LogoWidget.setPixmap(self.Logo)
         
 
 
@@ -514,6 +526,7 @@ class AddGameColor(QWidget):
 
 
 class GameTab(QFrame):
+    @tracing.traced("GameTab")
     def __init__(self, data):
         super().__init__()
         self.GameList = []
@@ -550,17 +563,11 @@ class GameTab(QFrame):
 
         self.dlg.exec()
     def accept(self):
-        game_id = shortuuid.uuid()
         name = self.GameName.value()
         logo = self.LogoPath.value()
         color = self.Color.color()
 
-        self.data['game_map'][name] = game_id
-        self.data['games'][game_id] = {
-            "name" : name,
-            "logo" : logo,
-            "color" : color
-        }
+        game_id = data_management.add_game(self.data, name, logo, color)
 
         self.layout.addWidget(GameBox(self.data, game_id))
 
@@ -600,35 +607,18 @@ class StreamInfo(QWidget):
         self.setMinimumWidth(400)
     
     def updateStreamPlat(self, plat):
-        old_link = self.data['streams'][self.id]['platform'] + self.data['streams'][self.id]['stream']
-        self.data['streams'][self.id]['platform'] = plat
-        new_link = plat + self.data['streams'][self.id]['stream']
-        self.data['stream_map'].pop(old_link)
-        self.data['stream_map'][new_link] = self.id
+        data_management.update_stream(self.data, self.id, 'platform', plat)
 
     def updateStreamName(self, name):
-        old_link = self.data['streams'][self.id]['platform'] + self.data['streams'][self.id]['stream']
-        self.data['streams'][self.id]['stream'] = name
-        new_link = self.data['streams'][self.id]['platform'] + name
-        self.data['stream_map'].pop(old_link)
-        self.data['stream_map'][new_link] = self.id
+        data_management.update_stream(self.data, self.id, 'stream', name)
 
     def updateStreamLogo(self, logo):
-        self.data['streams'][self.id]['logo'] = logo
+        data_management.update_stream(self.data, self.id, 'logo', logo)
         self.updateLogo.emit(logo)
 
     def removeStream(self):
-        if len(self.data['streams'][self.id]['blocks']) > 0:
-            return
-        else:
-            self.data['streams'].pop(self.id)
+        if data_management.remove_stream(self.data, self.id):
             self.parent().setVisible(False)
-            for day in self.data['days']:
-                try:
-                    index =self.data['days'][day]['streams'].index(self.id)
-                except ValueError:
-                    continue
-                self.data['days'][day]['streams'].pop(index)
         
         
 
@@ -638,11 +628,10 @@ class StreamBox(QWidget):
         super().__init__()
         self.Logo = None
         if data['streams'][stream_id] is not None:
-            self.Logo = QImage(data['streams'][stream_id]['logo'])
-        else: self.Logo = QImage("E:\\Acekingoffsuit clone\\Game Logos\\SSBUltimate.png")
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+            self.Logo = loadLogo(data['streams'][stream_id]['logo'])
+        else: self.Logo = loadLogo("E:\\Acekingoffsuit clone\\Game Logos\\SSBUltimate.png")
         self.LogoWidget = QLabel()
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.LogoWidget.setPixmap(self.Logo)
         self.StreamInfo = StreamInfo(data, stream_id)
         self.layout = QHBoxLayout()
         self.layout.addWidget(self.LogoWidget)
@@ -651,11 +640,11 @@ class StreamBox(QWidget):
         self.StreamInfo.updateLogo.connect(self.updateLogo)
         
     def updateLogo(self, path):
-        self.Logo = QImage(path)
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.Logo = loadLogo(path)
+        self.LogoWidget.setPixmap(self.Logo)
 
 class StreamTab(QWidget):
+    @tracing.traced("StreamTab")
     def __init__(self, data):
         self.data = data
         super().__init__()
@@ -703,17 +692,7 @@ class StreamTab(QWidget):
         channel = self.Channel.value()
         path = self.LogoPath.value()
 
-        stream_id = shortuuid.uuid()
-        stream_link = platform + channel
-
-        self.data['stream_map'][stream_link] = stream_id
-
-        self.data['streams'][stream_id] = {
-            "platform" : platform,
-            "stream" : channel,
-            "logo" : path,
-            "blocks" : []
-        }
+        stream_id = data_management.add_stream(self.data, platform, channel, path)
 
         index = self.layout.count() - 1
         self.layout.insertWidget(index, StreamBox(self.data, stream_id))
@@ -752,7 +731,7 @@ class BlockInfo(QWidget):
         self.data = data
         super().__init__()
         game_list = list(self.data['game_map'].keys())
-        self.Game = SearchableDropdown("Game", "", game_list)
+        self.Game = SearchableDropdown("Game", "", game_list, fuzzy.catalogs.get("games", self.data))
         self.GameOverride = QCheckBox("Override Game Name")
         self.GameName = TextRow("Game Name Override")
         self.GameName.hide()
@@ -811,9 +790,9 @@ class BlockInfo(QWidget):
                 self.Game.setValue(data['games'][game_id]['name'])
             if data['games'][game_id]['color']:
                 self.BlockColor.changeColor(data['games'][game_id]['color'])
-            if data['blocks'][block_id]['start']:
+            if data['blocks'][block_id]['start'] is not None:
                 self.StartTime.setTime(data['blocks'][block_id]['start'])
-            if data['blocks'][block_id]['end']:
+            if data['blocks'][block_id]['end'] is not None:
                 self.EndTime.setTime(data['blocks'][block_id]['end'])
             if data['blocks'][block_id]['round']:
                 self.Round.setValue(data['blocks'][block_id]['round'])
@@ -823,17 +802,17 @@ class BlockInfo(QWidget):
             game_id = self.data['game_map'][game]
         except KeyError:
             return
-        self.data['blocks'][self.id]['game'] = game_id
+        data_management.update_block(self.data, self.id, 'game', game_id)
         self.gameUpdated.emit(game_id)
 
     def updateRound(self, round):
-        self.data['blocks'][self.id]['round'] = round
+        data_management.update_block(self.data, self.id, 'round', round)
 
     def updateStart(self, start):
-        self.data['blocks'][self.id]['start'] = start
+        data_management.update_block(self.data, self.id, 'start', start)
 
     def updateEnd(self, end):
-        self.data['blocks'][self.id]['end'] = end
+        data_management.update_block(self.data, self.id, 'end', end)
 
     
 
@@ -844,20 +823,7 @@ class BlockInfo(QWidget):
     def removeBlock(self):
         self.parent().setVisible(False)
         self.parent().parent().layout.removeWidget(self)
-        for day in self.data['days']:
-            try:
-                index = self.data['days'][day]['blocks'].index(self.id)
-                self.data['days'][day]['blocks'].pop(index)
-            except ValueError:
-                continue
-        
-        for stream in self.data['streams']:
-            try:
-                index = self.data['streams'][stream]['blocks'].index(self.id)
-                self.data['streams'][stream]['blocks'].pop(index)
-            except ValueError:
-                continue
-        self.data['blocks'].pop(self.id)
+        data_management.remove_block(self.data, self.id)
         
 
             
@@ -888,12 +854,11 @@ class BlockBox(QFrame):
         self.Logo = None
         self.gameId = data['blocks'][block_id]['game'] 
         if self.gameId is not None:
-            self.Logo = QImage(data['games'][self.gameId]['logo'])
+            self.Logo = loadLogo(data['games'][self.gameId]['logo'])
         else: 
-            self.Logo = QImage("ssbu.png")
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+            self.Logo = loadLogo("ssbu.png")
         self.LogoWidget = QLabel()
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.LogoWidget.setPixmap(self.Logo)
         
 
         self.layout = QHBoxLayout()
@@ -908,13 +873,13 @@ class BlockBox(QFrame):
         self.BlockInfo.gameUpdated.connect(self.updateLogo)
 
     def updateLogo(self, game_id):
-        self.Logo = QImage(self.data['games'][game_id]['logo'])
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.Logo = loadLogo(self.data['games'][game_id]['logo'])
+        self.LogoWidget.setPixmap(self.Logo)
 
 
 
 class StreamBlocksTab(QWidget):
+    @tracing.traced("StreamBlocksTab")
     def __init__(self, data, stream_id, day_id):
         super().__init__()
         self.stream = stream_id
@@ -941,7 +906,7 @@ class StreamBlocksTab(QWidget):
         self.dLayout = QVBoxLayout()
         self.dlg.setLayout(self.dLayout)
         self.games = list(self.data['game_map'].keys())
-        self.c_box = SearchableDropdown("Game", "", self.games)
+        self.c_box = SearchableDropdown("Game", "", self.games, fuzzy.catalogs.get("games", self.data))
         self.round = TextRow("Round")
         self.start = TimeRow("Start Time")
         self.end   = TimeRow("End Time")
@@ -967,15 +932,7 @@ class StreamBlocksTab(QWidget):
         start = self.start.value()
         end = self.end.value()
 
-        block_id = shortuuid.uuid()
-        self.data['days'][self.day]['blocks'].append(block_id)
-        self.data['streams'][self.stream]['blocks'].append(block_id)
-        self.data['blocks'][block_id] = {
-            "game" : game_id,
-            "round" : round,
-            "start" : start,
-            "end" : end
-        }
+        block_id = data_management.add_block(self.data, self.day, self.stream, game_id, round, start, end)
         index = self.layout.count() - 2
         self.layout.insertWidget(index, BlockBox(self.data, block_id))
         
@@ -1011,8 +968,7 @@ class StreamDayInfo(QWidget):
         else:
             self.parent().setVisible(False)
             day_id = self.parent().parent().id
-            index = self.data['days'][day_id]['streams'].index(self.stream_id)
-            self.data['days'][day_id]['streams'].pop(index)
+            data_management.remove_day_stream(self.data, day_id, self.stream_id)
 
         
 class StreamDayBox(QFrame):
@@ -1022,12 +978,11 @@ class StreamDayBox(QFrame):
         self.data = data
         self.id= stream_id
         if data['streams'][stream_id]['logo'] is not None:
-            self.Logo = QImage(data['streams'][stream_id]['logo'])
+            self.Logo = loadLogo(data['streams'][stream_id]['logo'])
         else: 
-            self.Logo = QImage("ssbu.png")
-        self.Logo = self.Logo.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio)
+            self.Logo = loadLogo("ssbu.png")
         self.LogoWidget = QLabel()
-        self.LogoWidget.setPixmap(QPixmap(self.Logo))
+        self.LogoWidget.setPixmap(self.Logo)
         self.Info = StreamDayInfo(data, stream_id)
         self.layout = QHBoxLayout()
         self.layout.addWidget(self.LogoWidget)
@@ -1047,6 +1002,7 @@ class StreamDayBox(QFrame):
         self.parent().parent().loadStreamBlocks(self.id)
 
 class StreamDayTab(QWidget):
+    @tracing.traced("StreamDayTab")
     def __init__(self, day, data):
         super().__init__()
         self.layout = QVBoxLayout()
@@ -1074,7 +1030,7 @@ class StreamDayTab(QWidget):
         self.dLayout = QVBoxLayout()
         self.dlg.setLayout(self.dLayout)
         self.streams = list(self.data['stream_map'].keys())
-        self.c_box = SearchableDropdown("Stream", "", self.streams)
+        self.c_box = SearchableDropdown("Stream", "", self.streams, fuzzy.catalogs.get("streams", self.data))
         self.confirmButton = QPushButton("Add Stream")
         self.confirmButton.clicked.connect(self.accept)
         self.dLayout.addWidget(self.c_box)
@@ -1083,8 +1039,7 @@ class StreamDayTab(QWidget):
 
     def accept(self):
         stream_id = self.data['stream_map'][self.c_box.value()]
-        if not stream_id in self.data['days'][self.id]['streams']:
-            self.data['days'][self.id]['streams'].append(stream_id)
+        if data_management.add_day_stream(self.data, self.id, stream_id):
             index = self.layout.count() - 2
             self.layout.insertWidget(index ,StreamDayBox(self.data, stream_id))
 
@@ -1124,10 +1079,11 @@ class DayBox(QFrame):
         self.Date.changedDate.connect(self.updateDate)
 
     def updateDay(self, day):
-        self.data['days'][self.id]['day'] = day
+        data_management.update_day(self.data, self.id, 'day', day)
 
     def updateDate(self, date):
-        self.data['days'][self.id]['date'] = date
+        time_management.zone_tables.invalidate_day(self.data['days'][self.id]['date'])
+        data_management.update_day(self.data, self.id, 'date', date)
 
     def mousePressEvent(self, e):
         try:
@@ -1146,12 +1102,12 @@ class DayBox(QFrame):
             self.RemoveButton.setVisible(False)
     def removeDay(self):
         
-        if len(self.data['days'][self.id]['streams']) > 0:
+        if not data_management.remove_day(self.data, self.id):
             return
         self.parent().adjustSize()
         self.setVisible(False)
-        self.data['days'].pop(self.id)
 class DaysTab(QWidget):
+    @tracing.traced("DaysTab")
     def __init__(self, days, data):
         super().__init__()
         self.data = data
@@ -1176,16 +1132,9 @@ class DaysTab(QWidget):
 
     
     def addDay(self):
-        day_id = shortuuid.uuid()
-        day_obj = {
-            "day" : None,
-            "date" : None,
-            "blocks" : [],
-            "streams" : []
-        }
-        self.data['days'][day_id] = day_obj
-
-        newDayWidget = DayBox(day_obj, day_id, self.data)
+        day_id = data_management.add_day(self.data)
+
+        newDayWidget = DayBox(self.data['days'][day_id], day_id, self.data)
         index = self.layout.count() - 1
         self.layout.insertWidget(index, newDayWidget)
         size = self.size()
@@ -1194,6 +1143,8 @@ class DaysTab(QWidget):
 
 
 class BlocksTab(QFrame):
+    daySelected = pyqtSignal(str)
+    @tracing.traced("BlocksTab")
     def __init__(self, data):
         self.data = data
         super().__init__()
@@ -1215,6 +1166,7 @@ class BlocksTab(QFrame):
         self.setLineWidth(1)
         self.setFrameStyle(QFrame.Shape.Panel)
         
+    @tracing.traced("BlocksTab.loadDayStreams")
     def loadDayStreams(self, id):
         if self.currentDayID == id: return
         self.currentDayID = id
@@ -1234,7 +1186,9 @@ class BlocksTab(QFrame):
         height = self.StreamsColumn.layout.count() * 250
         self.setMinimumHeight(height)
         self.adjustSize()
+        self.daySelected.emit(id)
 
+    @tracing.traced("BlocksTab.loadStreamBlocks")
     def loadStreamBlocks(self, stream_id):
         self.stream_id = stream_id
         if self.BlockColumn:
@@ -1252,46 +1206,51 @@ class BlocksTab(QFrame):
 
 
 class mainTab(QTabWidget):
+    daySelected = pyqtSignal(str)
     def __init__(self, data):
         super().__init__()
         self.data = data
         self.oldIndex = None
 
+        # Only the visible tab is built up front; changeTabs builds the rest
+        # the first time they are shown.
         self.EventArea = QScrollArea()
         self.EventTab = EventTab(data)
         self.EventArea.setWidget(self.EventTab)
         self.addTab(self.EventArea, "Event")
 
-       
         self.BlocksArea = QScrollArea()
-        self.BlocksTab = BlocksTab(data)
-        self.BlocksArea.setWidget(self.BlocksTab)
+        self.BlocksTab = None
         self.addTab(self.BlocksArea, "Blocks")
         
         self.DaysArea = QScrollArea()
-        self.DaysTab = DaysTab(data['days'], data)
-        self.DaysArea.setWidget(self.DaysTab)
+        self.DaysTab = None
         self.addTab(self.DaysArea, "Days")
         
         self.GamesArea = QScrollArea()
-        self.GamesTab = GameTab(data)
-        self.GamesArea.setWidget(self.GamesTab)
+        self.GamesTab = None
         self.addTab(self.GamesArea, "Games")
         
         self.StreamArea = QScrollArea()
-        self.StreamTab = StreamTab(data)
-        self.StreamArea.setWidget(self.StreamTab)
+        self.StreamTab = None
         self.addTab(self.StreamArea, "Streams")
 
+        self.TimelineArea = QScrollArea()
+        self.TimelineArea.setWidgetResizable(True)
+        self.TimelineTab = None
+        self.addTab(self.TimelineArea, "Timeline")
+
         self.setMinimumSize(3000, 3000)
 
         self.currentChanged.connect(self.changeTabs)
 
     
+    @tracing.traced("mainTab.changeTabs")
     def changeTabs(self, newIndex):
         label = self.tabText(newIndex)
         if label == "Blocks":
             self.BlocksTab = BlocksTab(self.data)
+            self.BlocksTab.daySelected.connect(self.daySelected)
             self.BlocksArea.setWidget(self.BlocksTab)
         elif label == "Days":
             self.DaysTab = DaysTab(self.data['days'], self.data)
@@ -1305,16 +1264,86 @@ class mainTab(QTabWidget):
         elif label == "Event":
             self.EventTab = EventTab(self.data)
             self.EventArea.setWidget(self.EventTab)
-
+        elif label == "Timeline" and self.TimelineTab is None:
+            # keeps itself current from model changes, so it is built once
+            import timeline
+            self.TimelineTab = timeline.TimelineTab(self.data)
+            self.TimelineArea.setWidget(self.TimelineTab)
+
+    def showEntity(self, kind, entity_id):
+        # switches to the tab holding an entity's box and scrolls it into view
+        box = None
+        area = None
+        if kind == "block" and entity_id in self.data['blocks']:
+            day_id = next((day_id for day_id, day in self.data['days'].items() if entity_id in day['blocks']), None)
+            stream_id = next((stream_id for stream_id, stream in self.data['streams'].items() if entity_id in stream['blocks']), None)
+            if day_id is None or stream_id is None:
+                return
+            self.setCurrentIndex(self.indexOf(self.BlocksArea))
+            self.BlocksTab.loadDayStreams(day_id)
+            self.BlocksTab.loadStreamBlocks(stream_id)
+            layout = self.BlocksTab.BlockColumn.layout
+            boxes = [layout.itemAt(i).widget() for i in range(layout.count())]
+            box = next((box for box in boxes if isinstance(box, BlockBox) and box.id == entity_id), None)
+            area = self.BlocksArea
+        elif kind == "game" and entity_id in self.data['games']:
+            self.setCurrentIndex(self.indexOf(self.GamesArea))
+            box = next((box for box in self.GamesTab.GameList if box.game_id == entity_id), None)
+            area = self.GamesArea
+        elif kind == "day" and entity_id in self.data['days']:
+            self.setCurrentIndex(self.indexOf(self.DaysArea))
+        elif kind == "stream" and entity_id in self.data['streams']:
+            self.setCurrentIndex(self.indexOf(self.StreamArea))
+        elif kind == "zone":
+            self.setCurrentIndex(self.indexOf(self.EventArea))
+        if box is not None:
+            QApplication.processEvents()
+            area.ensureWidgetVisible(box)
+            box.setFocus()
+
+    def shutdown(self):
+        if self.TimelineTab is not None:
+            self.TimelineTab.shutdown()
+
+
+class ExportWorker(QObject):
+    # runs the process pool of an export off the GUI thread; the jobs are
+    # built from the live model before they get here
+    finished = pyqtSignal(object, object, object)
+    failed = pyqtSignal(str)
+
+    def run(self, jobs, directory):
+        import export
+        try:
+            rendered, skipped, failed = export.run_jobs(jobs, directory)
+        except Exception as e:
+            self.failed.emit(str(e) or type(e).__name__)
+            return
+        self.finished.emit(rendered, skipped, failed)
 
 class mainWindow(QMainWindow):
+    requestExport = pyqtSignal(object, str)
+
     def __init__(self, data):
         super().__init__()
         self.data = data
+        self.Journal = journal.Journal()
+        self.recovered = None
+        self.packPath = None
+        self.History = history.History(self.data)
         self.ScrollArea = QScrollArea()
-        self.ScrollArea.setWidget(mainTab(data))
-        
         self.setCentralWidget(self.ScrollArea)
+        # docks are built the first time they are shown, like the tabs
+        self.Preview = None
+        self.Issues = None
+        self.Search = None
+        self.Watcher = None
+        # the file as last loaded, saved or reloaded, and whether the model
+        # has edits since; a reload merges into unsaved edits instead of
+        # overwriting them
+        self.fileBase = None
+        self.unsaved = False
+        self.buildTabs()
         self.resize(1920, 1000)
         self.show()
 
@@ -1328,43 +1357,255 @@ class mainWindow(QMainWindow):
         
         saveAction = QAction("&Save File", self)
         saveAction.triggered.connect(self.saveFile)
+        self.exportAction = QAction("&Export Images", self)
+        self.exportAction.triggered.connect(self.exportImages)
+        packAction = QAction("Save With &Assets", self)
+        packAction.triggered.connect(self.savePack)
+        mergeAction = QAction("&Merge File", self)
+        mergeAction.triggered.connect(self.mergeFile)
         self.fileMenu.addAction(newAction)
         self.fileMenu.addAction(loadAction)
         self.fileMenu.addAction(saveAction)
+        self.fileMenu.addAction(packAction)
+        self.fileMenu.addAction(mergeAction)
+        self.fileMenu.addAction(self.exportAction)
+        self.feedAction = QAction("Serve Live &Feed", self)
+        self.feedAction.setCheckable(True)
+        self.feedAction.toggled.connect(self.toggleFeed)
+        self.fileMenu.addSeparator()
+        self.fileMenu.addAction(self.feedAction)
+        self.Feed = None
+        self.exportThread = None
+
+        self.editMenu = self.menuBar().addMenu("&Edit")
+        self.undoAction = QAction("&Undo", self)
+        self.undoAction.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undoAction.triggered.connect(self.undo)
+        self.redoAction = QAction("&Redo", self)
+        self.redoAction.setShortcut(QKeySequence.StandardKey.Redo)
+        self.redoAction.triggered.connect(self.redo)
+        self.editMenu.addAction(self.undoAction)
+        self.editMenu.addAction(self.redoAction)
+        findAction = QAction("&Find Blocks", self)
+        findAction.setShortcut(QKeySequence.StandardKey.Find)
+        findAction.triggered.connect(self.findBlocks)
+        self.editMenu.addSeparator()
+        self.editMenu.addAction(findAction)
+        self.updateEditActions()
+        data_management.add_listener(self.modelChanged)
+
+        self.viewMenu = self.menuBar().addMenu("&View")
+        self.dockActions = {}
+        for name, label in [("Preview", "&Preview"), ("Issues", "&Issues"), ("Search", "&Search")]:
+            action = QAction(label, self)
+            action.triggered.connect(lambda checked, name=name: self.showDock(name))
+            self.viewMenu.addAction(action)
+            self.dockActions[name] = action
+
+        self.traceMenu = self.menuBar().addMenu("&Trace")
+        self.traceAction = QAction("&Record Trace", self)
+        self.traceAction.setCheckable(True)
+        self.traceAction.setChecked(tracing.enabled)
+        self.traceAction.toggled.connect(self.toggleTracing)
+        exportTraceAction = QAction("&Export Trace", self)
+        exportTraceAction.triggered.connect(self.exportTrace)
+        self.traceMenu.addAction(self.traceAction)
+        self.traceMenu.addAction(exportTraceAction)
+
+        # the rest of start-up waits until the window has painted
+        QTimer.singleShot(0, self.startServices)
+
+    def startServices(self):
+        source = self.recoverEdits()
+        if source and source.endswith(pack.EXTENSION):
+            # recovered edits of a pack still use its logos
+            try:
+                pack.mount(source)
+                self.packPath = source
+            except (OSError, ValueError):
+                pass
+        elif source:
+            self.watchFile(source)
+            self.fileBase = self.readFileBase(source)
+        if source or self.recovered is not None:
+            self.unsaved = True
+            self.buildTabs()
+        logos.registry.watch(self.data)
+        fuzzy.catalogs.watch(self.data)
+        self.Journal.start(self.data, source)
+        if self.recovered is not None:
+            self.Journal.flush()
+            journal.discard(self.recovered[0])
+            journal.unlock(*self.recovered)
+            self.recovered = None
+        self.reportMissingLogos()
+
+    def showDock(self, name):
+        dock = getattr(self, name)
+        if dock is None:
+            if name == "Preview":
+                import preview
+                dock = preview.PreviewDock(self.data, self)
+                self.ScrollArea.widget().daySelected.connect(dock.selectDay)
+                area = Qt.DockWidgetArea.RightDockWidgetArea
+            elif name == "Issues":
+                import issues
+                dock = issues.IssuesDock(self.data, self)
+                dock.issueActivated.connect(self.showIssue)
+                area = Qt.DockWidgetArea.BottomDockWidgetArea
+            else:
+                import search
+                dock = search.SearchDock(self.data, self)
+                dock.blockActivated.connect(self.showBlock)
+                area = Qt.DockWidgetArea.LeftDockWidgetArea
+            self.addDockWidget(area, dock)
+            setattr(self, name, dock)
+            # from here on the dock's own action shows and hides it
+            self.viewMenu.insertAction(self.dockActions[name], dock.toggleViewAction())
+            self.viewMenu.removeAction(self.dockActions[name])
+        dock.show()
+        dock.raise_()
+        return dock
+
+    def findBlocks(self):
+        self.showDock("Search").focusQuery()
+
+    def watchFile(self, path):
+        # the watcher is only created once there is a file to watch
+        if self.Watcher is None:
+            if path is None:
+                return
+            import file_watcher
+            self.Watcher = file_watcher.ScheduleWatcher(self)
+            self.Watcher.reloaded.connect(self.fileReloaded)
+            self.Watcher.failed.connect(self.fileReloadFailed)
+        self.Watcher.watch(path)
+
+    def buildTabs(self):
+        if self.ScrollArea.widget() is not None:
+            self.ScrollArea.widget().shutdown()
+        tabs = mainTab(self.data)
+        if self.Preview is not None:
+            tabs.daySelected.connect(self.Preview.selectDay)
+        self.ScrollArea.setWidget(tabs)
+
+    def recoverEdits(self):
+        # offers the newest journal left by an editor that did not close
+        # cleanly; the others are discarded, or kept for the next start when
+        # one is recovered
+        source = None
+        for path, lock in journal.orphans():
+            if self.recovered is not None or not journal.has_edits(path):
+                if self.recovered is None:
+                    journal.discard(path)
+                journal.unlock(path, lock)
+                continue
+            answer = QMessageBox.question(self, "Recover Edits", "The editor did not close cleanly. Recover the unsaved edits?")
+            if answer == QMessageBox.StandardButton.Yes:
+                try:
+                    recovered, source = journal.recover(path)
+                except Exception as e:
+                    QMessageBox.warning(self, "Recover Edits", "Could not recover the edits: %s" % e)
+                else:
+                    data_management.replace_data(self.data, recovered)
+                    # dropped once this editor's own journal has them
+                    self.recovered = (path, lock)
+                    continue
+            journal.discard(path)
+            journal.unlock(path, lock)
+        return source
+
+    def undo(self):
+        if self.History.undo():
+            self.refreshTabs()
+
+    def redo(self):
+        if self.History.redo():
+            self.refreshTabs()
+
+    def modelChanged(self, data, record):
+        if data is self.data and record['op'] != "reset":
+            self.unsaved = True
+        self.updateEditActions()
+
+    def readFileBase(self, path):
+        try:
+            return data_management.parseJSON2(data_management.loadJSON(path))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def updateEditActions(self):
+        self.undoAction.setEnabled(self.History.canUndo())
+        self.redoAction.setEnabled(self.History.canRedo())
+
+    def refreshTabs(self):
+        tabs = self.ScrollArea.widget()
+        tabs.changeTabs(tabs.currentIndex())
+        self.updateEditActions()
+
+    def showIssue(self, kind, entity_id):
+        self.ScrollArea.widget().showEntity(kind, entity_id)
+
+    def showBlock(self, block_id):
+        self.ScrollArea.widget().showEntity("block", block_id)
+
+    def closeEvent(self, event):
+        data_management.remove_listener(self.modelChanged)
+        self.History.shutdown()
+        self.Journal.close()
+        for dock in [self.Preview, self.Issues, self.Search]:
+            if dock is not None:
+                dock.shutdown()
+        logos.registry.shutdown()
+        fuzzy.catalogs.shutdown()
+        if self.Feed is not None:
+            self.Feed.shutdown()
+        if self.exportThread is not None:
+            self.exportThread.quit()
+            self.exportThread.wait()
+        super().closeEvent(event)
 
     def createNew(self):
         self.hide()
         new_data = data_management.load_empty()
-        self.data['days'] = new_data['days']
-        self.data['event'] = new_data['event']
-        self.data['games'] = new_data['games']
-        self.data['streams'] = new_data['streams']
-        self.data['blocks'] = new_data['blocks']
-        self.data['zones'] = new_data['zones']
-        self.data['game_map'] = new_data['game_map']
-        self.data['stream_map'] = new_data['stream_map']
-        self.ScrollArea.setWidget(mainTab(self.data))
+        self.Journal.source = None
+        data_management.replace_data(self.data, new_data)
+        self.watchFile(None)
+        self.setPack(None)
+        self.fileBase = None
+        self.unsaved = False
+        self.buildTabs()
         self.show()
 
+    def setPack(self, path):
+        # the open pack stays mounted while its logos are in use
+        if self.packPath is not None and (path is None or os.path.abspath(path) != os.path.abspath(self.packPath)):
+            pack.unmount(self.packPath)
+        self.packPath = path
+
     def loadFile(self):
         dlg = QFileDialog()
         dlg.setAcceptMode(QFileDialog.AcceptMode.AcceptOpen)
         dlg.setFileMode(QFileDialog.FileMode.ExistingFile)
-        fileName = dlg.getOpenFileName(self, "Open Schedule", ".", "Schedule File (*.json)")
-        json = data_management.loadJSON(fileName[0])
-        new_data = data_management.parseJSON2(json)
+        fileName = dlg.getOpenFileName(self, "Open Schedule", ".", "Schedule File (*.json *%s)" % pack.EXTENSION)
+        if fileName[0].endswith(pack.EXTENSION):
+            new_data = pack.load_pack(fileName[0])
+            self.setPack(fileName[0])
+        else:
+            json = data_management.loadJSON(fileName[0])
+            new_data = data_management.parseJSON2(json)
+            self.setPack(None)
 
         self.hide()
-        self.data['days'] = new_data['days']
-        self.data['event'] = new_data['event']
-        self.data['games'] = new_data['games']
-        self.data['streams'] = new_data['streams']
-        self.data['blocks'] = new_data['blocks']
-        self.data['zones'] = new_data['zones']
-        self.data['game_map'] = new_data['game_map']
-        self.data['stream_map'] = new_data['stream_map']
-        self.ScrollArea.setWidget(mainTab(self.data))
+        self.Journal.source = fileName[0]
+        # the model takes over new_data's dicts, keep the file's version apart
+        self.fileBase = None if fileName[0].endswith(pack.EXTENSION) else copy.deepcopy(new_data)
+        data_management.replace_data(self.data, new_data)
+        self.unsaved = False
+        self.watchFile(None if fileName[0].endswith(pack.EXTENSION) else fileName[0])
+        self.buildTabs()
         self.show()
+        self.reportMissingLogos()
 
     def saveFile(self):
         dlg = QFileDialog()
@@ -1372,7 +1613,163 @@ class mainWindow(QMainWindow):
         dlg.setFileMode(QFileDialog.FileMode.AnyFile)
         fileName = dlg.getSaveFileName(self, "Open Schedule", ".", "Schedule File (*.json)")
         print(fileName)
+        if not fileName[0]:
+            return
+        self.extractPackLogos(fileName[0])
         data_management.save_data(fileName[0], self.data)
+        self.fileBase = copy.deepcopy(self.data)
+        self.unsaved = False
+        self.watchFile(fileName[0])
+        self.Journal.source = fileName[0]
+        self.Journal.compact()
+
+    def extractPackLogos(self, fileName):
+        # logos of an opened pack only resolve while it is mounted, so a JSON
+        # save copies them out next to the file and points the model at them
+        extracted = pack.extract_logos(self.data, os.path.splitext(fileName)[0] + "_logos")
+        missing = set()
+        with self.History.group():
+            for kind, collection in [("game", "games"), ("stream", "streams")]:
+                for entity_id, entity in list(self.data[collection].items()):
+                    if entity['logo'] in extracted:
+                        data_management.apply(self.data, {"op" : "set", "kind" : kind, "id" : entity_id, "key" : "logo", "value" : extracted[entity['logo']]})
+                    elif pack.is_pack_path(entity['logo']):
+                        missing.add(entity['logo'])
+        if extracted:
+            self.refreshTabs()
+        if missing:
+            QMessageBox.warning(self, "Save File", "%d logos come from an asset pack that is no longer open and will not load from the saved file:\n\n%s" %
+                                (len(missing), "\n".join(sorted(missing)[:30])))
+
+    def savePack(self):
+        fileName = QFileDialog.getSaveFileName(self, "Save With Assets", ".", "Asset Pack (*%s)" % pack.EXTENSION)[0]
+        if not fileName:
+            return
+        if not fileName.endswith(pack.EXTENSION):
+            fileName += pack.EXTENSION
+        count = pack.save_pack(fileName, self.data)
+        self.statusBar().showMessage("Saved %s with %d logos" % (fileName, count), 5000)
+
+    def fileReloaded(self, new_data):
+        import schedule_diff
+        import schedule_merge
+        if self.unsaved and self.fileBase is not None:
+            # take only what changed in the file since it was last read, so
+            # the edits made here survive
+            changes, aliases, conflicts = schedule_merge.merge_changes(self.fileBase, self.data, new_data)
+            self.fileBase = new_data
+            if not schedule_diff.is_empty(changes):
+                with self.History.group():
+                    schedule_diff.apply(self.data, changes, new_data, aliases)
+                self.refreshTabs()
+            if conflicts:
+                QMessageBox.warning(self, "File Changed On Disk", "The file changed on disk. %d of its changes conflict with unsaved edits here, kept the edits:\n\n%s" %
+                                    (len(conflicts), "\n".join(schedule_merge.describe_conflict(conflict) for conflict in conflicts[:30])))
+            elif not schedule_diff.is_empty(changes):
+                self.statusBar().showMessage("Merged changes made to the file on disk into the unsaved edits", 5000)
+            return
+        with self.History.group():
+            changes = schedule_diff.sync(self.data, new_data)
+        self.fileBase = new_data
+        self.unsaved = False
+        if schedule_diff.is_empty(changes):
+            return
+        self.refreshTabs()
+        self.statusBar().showMessage("Applied changes made to the file on disk", 5000)
+
+    def mergeFile(self):
+        baseName = QFileDialog.getOpenFileName(self, "Common Ancestor Schedule", ".", "Schedule File (*.json)")[0]
+        if not baseName:
+            return
+        theirName = QFileDialog.getOpenFileName(self, "Schedule To Merge In", ".", "Schedule File (*.json)")[0]
+        if not theirName:
+            return
+        import schedule_diff
+        import schedule_merge
+        base = data_management.parseJSON2(data_management.loadJSON(baseName))
+        theirs = data_management.parseJSON2(data_management.loadJSON(theirName))
+        changes, aliases, conflicts = schedule_merge.merge_changes(base, self.data, theirs)
+        with self.History.group():
+            schedule_diff.apply(self.data, changes, theirs, aliases)
+        self.refreshTabs()
+        if conflicts:
+            QMessageBox.warning(self, "Merge Conflicts", "%d conflicts, kept this schedule's values:\n\n%s" %
+                                (len(conflicts), "\n".join(schedule_merge.describe_conflict(conflict) for conflict in conflicts[:30])))
+        else:
+            self.statusBar().showMessage("Merged " + theirName, 5000)
+
+    def reportMissingLogos(self):
+        missing = logos.registry.missing(self.data)
+        if missing:
+            self.statusBar().showMessage("%d logo files are missing, see View > Issues" % len(missing), 10000)
+
+    def fileReloadFailed(self, message):
+        self.statusBar().showMessage("Could not reload file: " + message, 5000)
+
+    def exportImages(self):
+        directory = QFileDialog.getExistingDirectory(self, "Export Images", ".")
+        if not directory:
+            return
+        import export
+        try:
+            jobs = export.build_jobs(self.data)
+        except Exception as e:
+            QMessageBox.warning(self, "Export Images", "Could not prepare the export: %s" % e)
+            return
+        if self.exportThread is None:
+            self.exportThread = QThread(self)
+            self.exportWorker = ExportWorker()
+            self.exportWorker.moveToThread(self.exportThread)
+            self.requestExport.connect(self.exportWorker.run)
+            self.exportWorker.finished.connect(self.exportFinished)
+            self.exportWorker.failed.connect(self.exportFailed)
+            self.exportThread.start()
+        self.exportAction.setEnabled(False)
+        self.statusBar().showMessage("Exporting %d images to %s" % (len(jobs), directory))
+        self.requestExport.emit(jobs, directory)
+
+    def exportFinished(self, rendered, skipped, failed):
+        self.exportAction.setEnabled(True)
+        self.statusBar().showMessage("Exported %d images, %d unchanged, %d failed" % (len(rendered), len(skipped), len(failed)), 5000)
+        if failed:
+            details = "\n".join("%s: %s" % (name, error) for name, error in sorted(failed.items()))
+            QMessageBox.warning(self, "Export Images", "%d images could not be exported:\n%s" % (len(failed), details))
+
+    def exportFailed(self, message):
+        self.exportAction.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Export Images", "Could not export the images: %s" % message)
+
+    def toggleFeed(self, checked):
+        if not checked:
+            if self.Feed is not None:
+                self.Feed.shutdown()
+                self.Feed = None
+                self.statusBar().showMessage("Live feed stopped", 5000)
+            return
+        import feed
+        # edits within a quarter second publish as one snapshot
+        self.Feed = feed.Feed(self.data, publish_later=lambda publish: QTimer.singleShot(250, publish))
+        try:
+            self.Feed.start()
+        except OSError as e:
+            self.Feed = None
+            QMessageBox.warning(self, "Live Feed", "Could not start the live feed on port %d: %s" % (feed.PORT, e))
+            self.feedAction.setChecked(False)
+            return
+        self.statusBar().showMessage("Serving the live feed at %s" % self.Feed.url(), 10000)
+
+    def toggleTracing(self, checked):
+        if checked:
+            tracing.enable()
+        else:
+            tracing.disable()
+
+    def exportTrace(self):
+        dlg = QFileDialog()
+        fileName = dlg.getSaveFileName(self, "Export Trace", "trace.json", "Trace File (*.json)")
+        if fileName[0]:
+            tracing.export(fileName[0])
 
 def createWindow(data):
     